@@ -127,9 +127,9 @@ def ship_move(game_map, ship, position, posible_directions_dict, will_occuped_ce
         #     if game_map[cell].ship and game_map[cell].ship.owner != me:
         #         pass
         if len(directions_dict) == 1:
-            ship_direction = directions_dict.keys()[0]
+            ship_direction = list(directions_dict.keys())[0]
         elif len(directions_dict) > 0:
-            ship_direction = random.choice(directions_dict.keys())
+            ship_direction = random.choice(list(directions_dict.keys()))
         else:
             return ship.stay_still()
 
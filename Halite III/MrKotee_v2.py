@@ -127,9 +127,9 @@ def ship_move(game_map, ship, position, posible_directions_dict, will_occuped_ce
         #     if game_map[cell].ship and game_map[cell].ship.owner != me:
         #         pass
         if len(directions_dict) == 1:
-            ship_direction = directions_dict.keys()[0]
+            ship_direction = list(directions_dict.keys())[0]
         elif len(directions_dict) > 0:
-            ship_direction = random.choice(directions_dict.keys())
+            ship_direction = random.choice(list(directions_dict.keys()))
         else:
             return ship.stay_still()
 
@@ -200,11 +200,7 @@ while True:
     game_map = game.game_map
 
     if game.turn_number == 1:
-        height = game_map.height
-        width = game_map.width
-        for y in range(height):
-            for x in range(width):
-                halite_on_map += game_map[Position(x, y)].halite_amount
+        halite_on_map = game_map.total_halite()
         logging.info(f'halite on map: {halite_on_map}')
         logging.info(f'players: {len(game.players)}')
         HALITE_FOR_PLAYER = halite_on_map / len(game.players)
@@ -0,0 +1,39 @@
+"""
+Microbenchmark: line-by-line frame parsing against networking.BulkFrameReader.
+
+    python benchmarks/bench_frame_parser.py
+"""
+import timeit
+
+from synthetic import feed_stdin, frame_lines, make_game
+
+CASES = [
+    # width, height, players, ships per player, changed cells
+    (32, 32, 2, 20, 200),
+    (64, 64, 4, 50, 1000),
+    (64, 64, 4, 150, 3000),
+]
+REPEAT = 50
+
+
+def time_update_frame(game, lines):
+    def run():
+        feed_stdin(lines)
+        game.update_frame()
+    return min(timeit.repeat(run, number=1, repeat=REPEAT))
+
+
+def main():
+    print("{:>9} {:>7} {:>6} {:>6} {:>12} {:>12} {:>8}".format(
+        "map", "players", "ships", "cells", "lines (ms)", "bulk (ms)", "speedup"))
+    for width, height, num_players, ships, cells in CASES:
+        lines = frame_lines(1, width, height, num_players, ships, changed_cells=cells)
+        line_time = time_update_frame(make_game(width, height, num_players), lines)
+        bulk_time = time_update_frame(make_game(width, height, num_players, bulk_frames=True), lines)
+        print("{:>9} {:>7} {:>6} {:>6} {:>12.3f} {:>12.3f} {:>7.1f}x".format(
+            "{}x{}".format(width, height), num_players, ships, cells,
+            line_time * 1000, bulk_time * 1000, line_time / bulk_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark: Dijkstra cost-to-go fields per second on 64x64 maps, and paths and ranked moves per second read from
+the cached fields.
+
+    python benchmarks/bench_pathfinding.py
+"""
+import random
+import time
+
+from synthetic import feed_stdin, frame_lines, make_game
+from hlt.positionals import Position
+
+SIZE = 64
+NUM_PATHS = 500
+NUM_FIELDS = 20
+
+
+def main():
+    game = make_game(SIZE, SIZE, 4)
+    feed_stdin(frame_lines(1, SIZE, SIZE, 4, 100))
+    game.update_frame()
+    pathfinder = game.game_map.pathfinder
+    rng = random.Random(0)
+    targets = [Position(rng.randrange(SIZE), rng.randrange(SIZE)) for _ in range(NUM_FIELDS)]
+    pairs = [(Position(rng.randrange(SIZE), rng.randrange(SIZE)), rng.choice(targets)) for _ in range(NUM_PATHS)]
+    avoid = [ship.position for player in game.players.values() if player is not game.me
+             for ship in player.get_ships()]
+
+    for label, blocked in (("no avoid", None), ("avoid {} enemy ships".format(len(avoid)), avoid)):
+        pathfinder.clear()
+        start = time.perf_counter()
+        for target in targets:
+            pathfinder.cost_to_go(target, blocked)
+        elapsed = time.perf_counter() - start
+        print("{}x{} cost-to-go fields ({}): {:.1f} fields/s".format(SIZE, SIZE, label, NUM_FIELDS / elapsed))
+
+        start = time.perf_counter()
+        for source, target in pairs:
+            pathfinder.find_path(source, target, blocked)
+        elapsed = time.perf_counter() - start
+        print("{}x{} paths from cached fields ({}): {:.0f} paths/s".format(SIZE, SIZE, label, NUM_PATHS / elapsed))
+
+    start = time.perf_counter()
+    for source, target in pairs:
+        pathfinder.get_moves(source, target, avoid)
+    elapsed = time.perf_counter() - start
+    print("{}x{} ranked moves from cached fields: {:.0f} queries/s".format(SIZE, SIZE, NUM_PATHS / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+pytest-benchmark suite for the hlt SDK paths bots call every turn, on synthetic frames at every official map
+size with 2 and 4 players and up to 200 ships per player.
+
+    pytest benchmarks                     # run and save results under benchmarks/.benchmarks, from any directory
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:15%
+                                          # compare with the last saved run and fail on regressions
+    pytest benchmarks -k "64-4p-200"      # one scenario
+
+Results go to --benchmark-storage instead when it is given. Requires pytest-benchmark.
+"""
+import pytest
+
+from synthetic import feed_stdin, frame_lines, make_game
+from hlt.positionals import Position
+
+SIZES = [32, 40, 48, 56, 64]
+PLAYERS = [2, 4]
+SHIPS = [50, 200]
+
+
+@pytest.fixture(scope="module", params=[(size, players, ships) for size in SIZES for players in PLAYERS
+                                        for ships in SHIPS],
+                ids=lambda scenario: "{}-{}p-{}".format(*scenario))
+def scenario(request, tmp_path_factory):
+    size, num_players, ships = request.param
+    game = make_game(size, size, num_players, log_dir=str(tmp_path_factory.mktemp("bot-logs")))
+    frame = frame_lines(1, size, size, num_players, ships)
+    feed_stdin(frame)
+    game.update_frame()
+    all_ships = [ship for player in game.players.values() for ship in player.get_ships()]
+    return {
+        "game": game,
+        "map": game.game_map,
+        "ships": all_ships,
+        "my_ships": game.me.get_ships(),
+        "positions": [ship.position for ship in all_ships],
+        "target": game.me.shipyard.position,
+        "frame": frame,
+        "num_players": num_players,
+        "ships_per_player": ships,
+    }
+
+
+def test_calculate_distance(benchmark, scenario):
+    game_map, positions, target = scenario["map"], scenario["positions"], scenario["target"]
+    benchmark(lambda: [game_map.calculate_distance(position, target) for position in positions])
+
+
+def test_normalize(benchmark, scenario):
+    game_map = scenario["map"]
+    positions = [Position(position.x + game_map.width, position.y - game_map.height)
+                 for position in scenario["positions"]]
+    benchmark(lambda: [game_map.normalize(position) for position in positions])
+
+
+def test_getitem(benchmark, scenario):
+    game_map, positions = scenario["map"], scenario["positions"]
+    benchmark(lambda: [game_map[position] for position in positions])
+
+
+def test_cell_at_flat_index(benchmark, scenario):
+    game_map = scenario["map"]
+    indices = [game_map.index(position) for position in scenario["positions"]]
+    benchmark(lambda: [game_map.cell_at(index) for index in indices])
+
+
+def test_get_unsafe_moves(benchmark, scenario):
+    game_map, positions, target = scenario["map"], scenario["positions"], scenario["target"]
+    benchmark(lambda: [game_map.get_unsafe_moves(position, target) for position in positions])
+
+
+def test_naive_navigate(benchmark, scenario):
+    game_map, ships, target = scenario["map"], scenario["my_ships"], scenario["target"]
+
+    def reset():
+        game_map._clear_ships()
+        for ship in scenario["ships"]:
+            game_map[ship.position].mark_unsafe(ship)
+
+    benchmark.pedantic(lambda: [game_map.naive_navigate(ship, target) for ship in ships],
+                       setup=reset, rounds=50)
+
+
+def test_get_surrounding_cardinals(benchmark, scenario):
+    positions = scenario["positions"]
+    benchmark(lambda: [position.get_surrounding_cardinals() for position in positions])
+
+
+def test_game_map_update(benchmark, scenario):
+    game_map = scenario["map"]
+    cell_lines = scenario["frame"][1 + scenario["num_players"] * (1 + scenario["ships_per_player"] + 2):]
+    benchmark.pedantic(game_map._update, setup=lambda: feed_stdin(cell_lines), rounds=50)
+
+
+def test_player_update(benchmark, scenario):
+    player = scenario["game"].me
+    frame = scenario["frame"]
+    ships = scenario["ships_per_player"]
+    header = frame[1].split()
+    body = frame[2:2 + ships + int(header[2])]
+    benchmark.pedantic(player._update, args=(ships, int(header[2]), int(header[3])),
+                       setup=lambda: feed_stdin(body), rounds=50)
+
+
+def test_spatial_index_nearest(benchmark, scenario):
+    game, positions = scenario["game"], [ship.position for ship in scenario["my_ships"]]
+
+    def query():
+        game.game_map._spatial_index = None
+        index = game.game_map.spatial_index(game.players.values())
+        return [index.nearest(position, 1, not_owner=game.my_id) for position in positions]
+
+    benchmark(query)
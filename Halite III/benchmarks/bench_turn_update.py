@@ -0,0 +1,38 @@
+"""
+Benchmark: Game.update_frame time at 32x32 against 64x64 for the same fleet size.
+
+With occupancy cleared incrementally the turn update should cost about the same on both maps.
+
+    python benchmarks/bench_turn_update.py
+"""
+import timeit
+
+from synthetic import feed_stdin, frame_lines, make_game
+
+SIZES = [32, 64]
+FLEETS = [10, 50, 150]
+NUM_PLAYERS = 4
+REPEAT = 50
+
+
+def time_update_frame(size, ships, bulk_frames):
+    game = make_game(size, size, NUM_PLAYERS, bulk_frames=bulk_frames)
+    frames = [frame_lines(turn, size, size, NUM_PLAYERS, ships) for turn in range(1, REPEAT + 1)]
+
+    def run():
+        feed_stdin(frames[game.turn_number % REPEAT])
+        game.update_frame()
+    return min(timeit.repeat(run, number=1, repeat=REPEAT))
+
+
+def main():
+    print("{:>6} {:>16} {:>12} {:>12}".format("parser", "ships per player", "32x32 (ms)", "64x64 (ms)"))
+    for bulk_frames in (False, True):
+        for ships in FLEETS:
+            times = [time_update_frame(size, ships, bulk_frames) for size in SIZES]
+            print("{:>6} {:>16} {:>12.3f} {:>12.3f}".format(
+                "bulk" if bulk_frames else "lines", ships, *(t * 1000 for t in times)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+import os
+
+import pytest
+
+STORAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".benchmarks")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # Keep saved runs next to the benchmarks wherever pytest is started from, unless --benchmark-storage is given
+    if config.getoption("benchmark_storage") == "file://./.benchmarks":
+        config.option.benchmark_storage = "file://" + STORAGE
@@ -0,0 +1,99 @@
+"""
+Synthetic engine input for the benchmarks.
+
+Builds the same text the engine sends (constants, players, map, then one frame per turn) so the hlt package can
+be driven without an engine binary.
+"""
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import hlt  # noqa: E402
+
+CONSTANTS = {
+    "NEW_ENTITY_ENERGY_COST": 1000,
+    "DROPOFF_COST": 4000,
+    "MAX_ENERGY": 1000,
+    "MAX_TURNS": 500,
+    "EXTRACT_RATIO": 4,
+    "MOVE_COST_RATIO": 10,
+    "INSPIRATION_ENABLED": True,
+    "INSPIRATION_RADIUS": 4,
+    "INSPIRATION_SHIP_COUNT": 2,
+    "INSPIRED_EXTRACT_RATIO": 4,
+    "INSPIRED_BONUS_MULTIPLIER": 2.0,
+    "INSPIRED_MOVE_COST_RATIO": 10,
+}
+
+
+def init_lines(width, height, num_players, my_id=0, seed=0):
+    """
+    :return: The pre-game lines the engine sends, as a list of strings
+    """
+    rng = random.Random(seed)
+    lines = [json.dumps(CONSTANTS), "{} {}".format(num_players, my_id)]
+    for player in range(num_players):
+        lines.append("{} {} {}".format(player, rng.randrange(width), rng.randrange(height)))
+    lines.append("{} {}".format(width, height))
+    for _ in range(height):
+        lines.append(" ".join(str(rng.randrange(1000)) for _ in range(width)))
+    return lines
+
+
+def frame_lines(turn, width, height, num_players, ships_per_player, dropoffs_per_player=2,
+                changed_cells=None, seed=0):
+    """
+    :param changed_cells: How many changed cells to report; defaults to one per ship
+    :return: The lines of one turn frame, as a list of strings
+    """
+    rng = random.Random(seed * 100003 + turn)
+    lines = [str(turn)]
+    ship_id = 0
+    for player in range(num_players):
+        lines.append("{} {} {} {}".format(player, ships_per_player, dropoffs_per_player, 5000))
+        for _ in range(ships_per_player):
+            lines.append("{} {} {} {}".format(ship_id, rng.randrange(width), rng.randrange(height),
+                                              rng.randrange(1000)))
+            ship_id += 1
+        for dropoff in range(dropoffs_per_player):
+            lines.append("{} {} {}".format(player * 100 + dropoff, rng.randrange(width), rng.randrange(height)))
+    if changed_cells is None:
+        changed_cells = num_players * ships_per_player
+    lines.append(str(changed_cells))
+    for _ in range(changed_cells):
+        lines.append("{} {} {}".format(rng.randrange(width), rng.randrange(height), rng.randrange(1000)))
+    return lines
+
+
+def feed_stdin(lines):
+    """
+    Replaces sys.stdin with a stream holding the given lines, usable both through input() and sys.stdin.buffer.
+    """
+    sys.stdin = io.TextIOWrapper(io.BytesIO(("\n".join(lines) + "\n").encode()))
+
+
+_log_dir = None
+
+
+def make_game(width, height, num_players, log_dir=None, **kwargs):
+    """
+    Creates a hlt.Game from synthetic pre-game input. The working directory is left unchanged.
+    :param log_dir: The directory to write the bot log to (one temporary directory shared by every call if None)
+    """
+    global _log_dir
+    if log_dir is None:
+        if _log_dir is None:
+            _log_dir = tempfile.mkdtemp(prefix="hlt-bench-")
+        log_dir = _log_dir
+    cwd = os.getcwd()
+    os.chdir(log_dir)
+    try:
+        feed_stdin(init_lines(width, height, num_players))
+        return hlt.Game(**kwargs)
+    finally:
+        os.chdir(cwd)
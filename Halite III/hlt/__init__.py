@@ -2,4 +2,4 @@
 
 from . import commands, entity, game_map, networking, constants
 from .networking import Game
-from .positionals import Direction, Position
+from .positionals import Direction, Position, FrozenPosition
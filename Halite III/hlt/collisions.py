@@ -0,0 +1,121 @@
+"""
+Global per-turn move assignment for a player's ships.
+
+Every ship submits its desired moves in order of preference, and resolve() assigns all of them at once so that
+no two of the player's ships end the turn on the same cell. Swaps and chains of ships following each other are
+allowed, since the engine only checks where ships end up.
+"""
+from . import constants
+from .positionals import Direction
+
+
+class MoveResolver:
+    """
+    Resolves ranked move requests into collision-free moves, as a deferred-acceptance matching of ships to cells.
+
+    Each ship proposes its preferred cells in turn; a contested cell goes to the ship staying on it, or else to
+    the higher-priority ship, and the loser falls back to its next choice. Staying still is every ship's last
+    resort and always wins its own cell, so every ship gets a move. Each ship proposes at most five times,
+    so resolving is linear in the number of ships.
+    """
+    def __init__(self, game_map):
+        """
+        :param game_map: The game map
+        """
+        self._game_map = game_map
+        self._ships = []
+        self._choices = []
+        self._priorities = []
+        self._blocked = set()
+        self._owners = {}
+
+    def _index(self, position):
+        return (position.y % self._game_map.height) * self._game_map.width + position.x % self._game_map.width
+
+    def block(self, position):
+        """
+        Keep ships from moving onto a cell, e.g. one next to an enemy ship. Ships already on it may still stay.
+        :param position: The cell to block
+        :return: nothing
+        """
+        self._blocked.add(self._index(position))
+
+    def submit(self, ship, directions, priority=0):
+        """
+        Request moves for a ship. Staying still is added as the last choice if it is not listed.
+        Ships that cannot pay to leave their cell only get to stay still.
+        :param ship: The ship to move
+        :param directions: The Directions the ship wants to move in, most preferred first
+        :param priority: Higher-priority ships win contested cells; equal priorities go to the earlier submission
+        :return: nothing
+        """
+        start = self._index(ship.position)
+        move_cost = self._game_map[ship.position].halite_amount // constants.MOVE_COST_RATIO
+        choices = []
+        if ship.halite_amount >= move_cost:
+            for direction in directions:
+                cell = self._index(self._game_map.offset(ship.position, direction))
+                if (cell != start and cell in self._blocked) or any(cell == chosen for _, chosen in choices):
+                    continue
+                choices.append((direction, cell))
+        if not any(cell == start for _, cell in choices):
+            choices.append((Direction.Still, start))
+        self._ships.append(ship)
+        self._choices.append(choices)
+        self._priorities.append(priority)
+
+    def resolve(self):
+        """
+        Assign every submitted ship a move.
+        :return: A dict from ship id to the Direction it was assigned
+        """
+        ships = self._ships
+        choices = self._choices
+        priorities = self._priorities
+        starts = [self._index(ship.position) for ship in ships]
+        next_choice = [0] * len(ships)
+        owners = {}
+
+        free = list(range(len(ships) - 1, -1, -1))
+        while free:
+            proposer = free.pop()
+            _, cell = choices[proposer][next_choice[proposer]]
+            holder = owners.get(cell)
+            if holder is not None and not self._beats(proposer, holder, cell, starts, priorities):
+                next_choice[proposer] += 1
+                free.append(proposer)
+                continue
+            owners[cell] = proposer
+            if holder is not None:
+                next_choice[holder] += 1
+                free.append(holder)
+
+        self._owners = {cell: ships[index] for cell, index in owners.items()}
+        return {ship.id: choices[index][next_choice[index]][0] for index, ship in enumerate(ships)}
+
+    @staticmethod
+    def _beats(challenger, holder, cell, starts, priorities):
+        """
+        :return: Whether challenger should take cell from holder
+        """
+        if starts[holder] == cell:
+            return False
+        if starts[challenger] == cell:
+            return True
+        return (priorities[challenger], -challenger) > (priorities[holder], -holder)
+
+    def commands(self):
+        """
+        Resolve and build the move commands for all submitted ships.
+        :return: A list of command strings
+        """
+        moves = self.resolve()
+        return [ship.stay_still() if moves[ship.id] == Direction.Still else ship.move(moves[ship.id])
+                for ship in self._ships]
+
+    def is_free(self, position):
+        """
+        :param position: A cell
+        :return: Whether none of the submitted ships ends the turn on the cell after the last resolve()
+        """
+        return self._index(position) not in self._owners
@@ -1,3 +1,19 @@
+import logging
+import sys
+
+
+_input_log = None
+
+
+def log_input(log):
+    """
+    Starts or stops keeping every line read_input returns, e.g. for recording a replay.
+    :param log: A list to append lines to, or None to stop
+    """
+    global _input_log
+    _input_log = log
+
+
 # Placed here to avoid circular imports
 def read_input():
     """
@@ -5,7 +21,24 @@ def read_input():
     :return: input read
     """
     try:
-        return input()
+        line = input()
     except EOFError as eof:
         logging.shutdown()
         raise SystemExit(eof)
+    if _input_log is not None:
+        _input_log.append(line)
+    return line
+
+
+def read_input_bytes(size):
+    """
+    Reads whatever raw bytes are available on stdin (at most size, blocking only until some arrive),
+    shutting down logging and exiting at end of input
+    :param size: The maximum number of bytes to read
+    :return: the bytes read
+    """
+    data = sys.stdin.buffer.read1(size)
+    if not data:
+        logging.shutdown()
+        raise SystemExit("EOF when reading a frame")
+    return data
@@ -0,0 +1,87 @@
+"""
+Per-turn opponent danger map.
+
+Counts the opponent ships at each exact Manhattan distance (0, 1, 2, ...) from every cell, and the cargo they
+carry, from the players' ship columns in one pass of array shifts. Navigation, collision avoidance and attack
+targeting can then read a cell's danger with a single lookup instead of scanning the cells around every enemy
+ship. Requires NumPy.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class DangerMap:
+    """
+    Opponent ships and cargo around every cell of the map. Arrays are indexed as [distance, y, x].
+    """
+    def __init__(self, game_map, player, players, max_distance=2):
+        """
+        :param game_map: The game map
+        :param player: The player whose opponents to count
+        :param players: All players in the game (the player itself is skipped)
+        :param max_distance: The largest Manhattan distance to count ships at
+        """
+        self._game_map = game_map
+        self.max_distance = max_distance
+        height, width = game_map.height, game_map.width
+
+        occupancy = np.zeros((height, width), dtype=np.int64)
+        cargo = np.zeros((height, width), dtype=np.int64)
+        for other in players:
+            if other.id == player.id:
+                continue
+            _, xs, ys, ship_cargo = other.ship_arrays()
+            np.add.at(occupancy, (ys, xs), 1)
+            np.add.at(cargo, (ys, xs), ship_cargo)
+
+        """Opponent ships at exactly each distance from each cell."""
+        self.ships = np.zeros((max_distance + 1, height, width), dtype=np.int64)
+        """Total cargo of the opponent ships at exactly each distance from each cell."""
+        self.cargo = np.zeros((max_distance + 1, height, width), dtype=np.int64)
+        for distance in range(max_distance + 1):
+            for dx in range(-distance, distance + 1):
+                rest = distance - abs(dx)
+                for dy in {-rest, rest}:
+                    self.ships[distance] += np.roll(occupancy, (dy, dx), axis=(0, 1))
+                    self.cargo[distance] += np.roll(cargo, (dy, dx), axis=(0, 1))
+
+        """Opponent ships within each distance of each cell."""
+        self.ships_within = np.cumsum(self.ships, axis=0)
+        """Total cargo of the opponent ships within each distance of each cell."""
+        self.cargo_within = np.cumsum(self.cargo, axis=0)
+
+    def count(self, position, distance=0):
+        """
+        :param position: The cell to look up
+        :param distance: The exact distance to count opponent ships at
+        :return: How many opponent ships are exactly distance away from position
+        """
+        return int(self.ships[distance, position.y % self._game_map.height, position.x % self._game_map.width])
+
+    def count_within(self, position, radius=1):
+        """
+        :param position: The cell to look up
+        :param radius: The distance to count opponent ships within
+        :return: How many opponent ships are at most radius away from position
+        """
+        return int(self.ships_within[radius, position.y % self._game_map.height,
+                                     position.x % self._game_map.width])
+
+    def cargo_near(self, position, radius=1):
+        """
+        :param position: The cell to look up
+        :param radius: The distance to sum cargo within
+        :return: The total cargo of the opponent ships at most radius away from position
+        """
+        return int(self.cargo_within[radius, position.y % self._game_map.height,
+                                     position.x % self._game_map.width])
+
+    def is_safe(self, position, radius=1):
+        """
+        :param position: The cell to look up
+        :param radius: The distance an opponent ship must be beyond
+        :return: Whether no opponent ship is within radius of position
+        """
+        return self.count_within(position, radius) == 0
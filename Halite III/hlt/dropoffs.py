@@ -0,0 +1,91 @@
+"""
+Whole-map dropoff site scoring.
+
+Scores every cell at once as a dropoff site from the halite around it, its distance to the player's existing
+structures and how many opponents are near it, so strategies can pick sites without per-ship window sums.
+Requires NumPy.
+"""
+import numpy as np
+
+from . import constants
+from .fields import diamond_kernel, toroidal_convolve
+
+
+class DropoffScores:
+    """
+    Dropoff site scores for every cell of the map. Arrays are indexed as [y, x].
+    """
+    def __init__(self, game_map, player, players, radius=4, enemy_radius=4, enemy_penalty=None,
+                 min_distance=8, max_distance=None, min_halite=0):
+        """
+        :param game_map: The game map
+        :param player: The player looking for a site
+        :param players: All players in the game (the player itself is skipped)
+        :param radius: Manhattan radius of the halite window around a site
+        :param enemy_radius: Manhattan radius within which opponent ships and structures count against a site
+        :param enemy_penalty: Halite subtracted from a site's score per nearby opponent ship or structure.
+            Defaults to constants.MAX_HALITE.
+        :param min_distance: Sites closer than this to one of the player's structures are not candidates
+        :param max_distance: Sites further than this from the player's structures are not candidates (None: no limit)
+        :param min_halite: Sites with less halite than this within radius are not candidates
+        """
+        if enemy_penalty is None:
+            enemy_penalty = constants.MAX_HALITE
+        self._game_map = game_map
+
+        """Halite within radius of each cell."""
+        self.halite = game_map.halite_integral().diamond_sums(radius)
+        """Distance from each cell to the nearest of the player's structures."""
+        self.distance = game_map.deposit_field(player).distance
+
+        enemies = np.zeros((game_map.height, game_map.width), dtype=np.int64)
+        for other in players:
+            if other.id == player.id:
+                continue
+            _, xs, ys, _ = other.ship_arrays()
+            np.add.at(enemies, (ys, xs), 1)
+            for entity in other.get_dropoffs() + [other.shipyard]:
+                enemies[entity.position.y % game_map.height, entity.position.x % game_map.width] += 1
+        """Opponent ships and structures within enemy_radius of each cell."""
+        self.enemies = toroidal_convolve(enemies, diamond_kernel(game_map.width, game_map.height, enemy_radius))
+
+        """Site score of each cell: the halite around it less the opponent penalty."""
+        self.score = self.halite - enemy_penalty * self.enemies
+        """Whether each cell passes the distance and halite filters."""
+        self.candidates = (self.distance >= min_distance) & (self.halite >= min_halite)
+        if max_distance is not None:
+            self.candidates &= self.distance <= max_distance
+
+    def score_at(self, position):
+        """
+        :param position: The position to look up
+        :return: The site score of position, or None if it is not a candidate
+        """
+        y = position.y % self._game_map.height
+        x = position.x % self._game_map.width
+        return int(self.score[y, x]) if self.candidates[y, x] else None
+
+    def top(self, k=1):
+        """
+        :param k: The number of sites to return
+        :return: A list of up to k (position, score) pairs of the best candidate sites, best first
+        """
+        indices = np.flatnonzero(self.candidates)
+        scores = self.score.ravel()[indices]
+        best = np.argsort(-scores, kind="stable")[:k]
+        width = self._game_map.width
+        return [(self._game_map.position(index % width, index // width), score)
+                for index, score in zip(indices[best].tolist(), scores[best].tolist())]
+
+
+def best_dropoff_sites(game_map, player, players, k=1, **kwargs):
+    """
+    Score every cell as a dropoff site and return the best ones.
+    :param game_map: The game map
+    :param player: The player looking for a site
+    :param players: All players in the game
+    :param k: The number of sites to return
+    :param kwargs: Scoring options, see DropoffScores
+    :return: A list of up to k (position, score) pairs, best first
+    """
+    return DropoffScores(game_map, player, players, **kwargs).top(k)
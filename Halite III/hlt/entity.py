@@ -49,10 +49,15 @@ class Shipyard(Entity):
 class Ship(Entity):
     """
     Ship class to house ship entities
+
+    Ship objects obtained from a Player persist across turns, so the state
+    attribute is free for strategies to keep per-ship data in (a role, a
+    target, ...) instead of side tables keyed by ship id.
     """
     def __init__(self, owner, id, position, halite_amount):
         super().__init__(owner, id, position)
         self.halite_amount = halite_amount
+        self.state = None
 
     @property
     def is_full(self):
@@ -0,0 +1,225 @@
+"""
+Whole-map fields computed with NumPy, used for O(1) per-cell queries.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .positionals import Direction
+
+
+def diamond_kernel(width, height, radius):
+    """
+    :param width: The map width
+    :param height: The map height
+    :param radius: The Manhattan radius
+    :return: A (height, width) int64 array that is 1 on every cell within radius of (0, 0), accounting for
+        wrap-around, for use with toroidal_convolve
+    """
+    xs = np.arange(width)
+    ys = np.arange(height)
+    distances = np.add.outer(np.minimum(ys, height - ys), np.minimum(xs, width - xs))
+    return (distances <= radius).astype(np.int64)
+
+
+def toroidal_convolve(grid, kernel):
+    """
+    Circular 2D convolution of grid with kernel, via FFT, so windows wrap around the map edges.
+    :param grid: A (height, width) array, indexed as [y, x]
+    :param kernel: A (height, width) array with its origin at [0, 0] (see diamond_kernel)
+    :return: A (height, width) array where [y, x] holds the sum of grid[y - dy, x - dx] * kernel[dy, dx],
+        indices wrapping. Integer inputs give an int64 result.
+    """
+    result = np.fft.irfft2(np.fft.rfft2(grid) * np.fft.rfft2(kernel), s=grid.shape)
+    if np.issubdtype(grid.dtype, np.integer) and np.issubdtype(kernel.dtype, np.integer):
+        return np.rint(result).astype(np.int64)
+    return result
+
+
+class DistanceField:
+    """
+    Distance from every cell of the map to the nearest of a set of structures, accounting for wrap-around.
+
+    Also keeps which structure is nearest to each cell and which cardinal moves bring a ship closer to it,
+    so a ship can find its way to the nearest deposit in O(1).
+    Arrays are indexed as [y, x].
+    """
+    def __init__(self, game_map, structures):
+        """
+        :param game_map: The game map
+        :param structures: The structures (shipyard, dropoffs, ...) to measure from
+        """
+        self.width = game_map.width
+        self.height = game_map.height
+        self.structures = list(structures)
+
+        distances = np.stack([game_map.distances_from(structure.position) for structure in self.structures])
+        """Distance to the nearest structure."""
+        self.distance = distances.min(axis=0)
+        """Index into structures of the nearest structure."""
+        self.nearest = distances.argmin(axis=0)
+
+        # For each cardinal, whether moving that way from a cell gets closer to the nearest structure
+        self._closer = np.stack([np.roll(self.distance, (-direction[1], -direction[0]), axis=(0, 1)) < self.distance
+                                 for direction in Direction.get_all_cardinals()])
+
+    def distance_to(self, position):
+        """
+        :param position: The position to look up
+        :return: The distance from position to the nearest structure
+        """
+        return int(self.distance[position.y % self.height, position.x % self.width])
+
+    def nearest_structure(self, position):
+        """
+        :param position: The position to look up
+        :return: The structure nearest to position
+        """
+        return self.structures[self.nearest[position.y % self.height, position.x % self.width]]
+
+    def get_moves(self, position):
+        """
+        :param position: The position to look up
+        :return: A list of the cardinal Directions that get closer to the nearest structure,
+            empty if position is on a structure
+        """
+        y = position.y % self.height
+        x = position.x % self.width
+        return [direction for index, direction in enumerate(Direction.get_all_cardinals())
+                if self._closer[index, y, x]]
+
+    def get_move(self, position):
+        """
+        :param position: The position to look up
+        :return: A Direction that gets closer to the nearest structure, or Direction.Still if position is on one
+        """
+        moves = self.get_moves(position)
+        return moves[0] if moves else Direction.Still
+
+
+class HaliteIntegral:
+    """
+    Wrap-aware summed-area table (integral image) over a halite grid, for O(1) rectangle sums and O(radius)
+    Manhattan-diamond sums at any position, or whole-map window sums in a few NumPy passes.
+
+    The table covers the grid tiled 2x2, so any window up to the map size starting inside the map is a plain
+    rectangle in it. Keep it current by calling update() with each turn's changed cells before they are written
+    to the grid (GameMap does this for the map's own integral); after changing the grid any other way, call
+    rebuild().
+    """
+    """Above this many changed cells, rebuilding the table is cheaper than patching it."""
+    _INCREMENTAL_LIMIT = 4
+
+    def __init__(self, halite_grid):
+        """
+        :param halite_grid: The (height, width) halite array, indexed as [y, x]
+        """
+        self._grid = halite_grid
+        self.height, self.width = halite_grid.shape
+        self._table = None
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Recomputes the whole table from the grid.
+        :return: nothing
+        """
+        self._table = self._build_table(self._grid)
+
+    def _build_table(self, grid):
+        """
+        :param grid: The (height, width) halite array to sum
+        :return: The (2 * height + 1, 2 * width + 1) summed-area table of grid tiled 2x2
+        """
+        table = np.zeros((2 * self.height + 1, 2 * self.width + 1), dtype=np.int64)
+        np.cumsum(np.tile(grid, (2, 2)), axis=0, out=table[1:, 1:])
+        np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+        return table
+
+    def update(self, xs, ys, halite_amounts):
+        """
+        Applies changed cells to the table. Must be called before the new values are written to the grid.
+        :param xs: The changed cells' x coordinates
+        :param ys: The changed cells' y coordinates
+        :param halite_amounts: The changed cells' new halite amounts
+        :return: nothing
+        """
+        if len(xs) > self._INCREMENTAL_LIMIT:
+            grid = self._grid.copy()
+            grid[ys, xs] = halite_amounts
+            self._table = self._build_table(grid)
+            return
+
+        for x, y, halite_amount in zip(xs, ys, halite_amounts):
+            delta = int(halite_amount) - int(self._grid[y, x])
+            if delta:
+                for tile_y in (y + 1, y + self.height + 1):
+                    for tile_x in (x + 1, x + self.width + 1):
+                        self._table[tile_y:, tile_x:] += delta
+
+    def rectangle_sum(self, x, y, width, height):
+        """
+        :param x: The x coordinate of the top-left cell, wrapped around the map if needed
+        :param y: The y coordinate of the top-left cell, wrapped around the map if needed
+        :param width: The number of columns, clipped to the map width
+        :param height: The number of rows, clipped to the map height
+        :return: The total halite in the rectangle
+        """
+        x0 = x % self.width
+        y0 = y % self.height
+        x1 = x0 + min(width, self.width)
+        y1 = y0 + min(height, self.height)
+        table = self._table
+        return int(table[y1, x1] - table[y0, x1] - table[y1, x0] + table[y0, x0])
+
+    def square_sum(self, position, radius):
+        """
+        :param position: The center of the window
+        :param radius: The Chebyshev radius of the window
+        :return: The total halite within radius of position, counting each cell once
+        """
+        return self.rectangle_sum(position.x - radius, position.y - radius, 2 * radius + 1, 2 * radius + 1)
+
+    def diamond_sum(self, position, radius):
+        """
+        :param position: The center of the window
+        :param radius: The Manhattan radius of the window
+        :return: The total halite within Manhattan distance radius of position, counting each cell once
+        """
+        return sum(self.rectangle_sum(position.x - half_width, position.y + dy, 2 * half_width + 1, 1)
+                   for dy, half_width in self._diamond_rows(radius))
+
+    def square_sums(self, radius):
+        """
+        :param radius: The Chebyshev radius of the window
+        :return: A (height, width) array of the square window sum centered on every cell
+        """
+        size_x = min(2 * radius + 1, self.width)
+        size_y = min(2 * radius + 1, self.height)
+        xs = (np.arange(self.width) - radius) % self.width
+        ys = (np.arange(self.height) - radius) % self.height
+        table = self._table
+        return (table[np.ix_(ys + size_y, xs + size_x)] - table[np.ix_(ys, xs + size_x)]
+                - table[np.ix_(ys + size_y, xs)] + table[np.ix_(ys, xs)])
+
+    def diamond_sums(self, radius):
+        """
+        :param radius: The Manhattan radius of the window
+        :return: A (height, width) array of the diamond window sum centered on every cell
+        """
+        rows = np.diff(self._table[:self.height + 1], axis=0)
+        sums = np.zeros((self.height, self.width), dtype=np.int64)
+        for dy, half_width in self._diamond_rows(radius):
+            size = min(2 * half_width + 1, self.width)
+            xs = (np.arange(self.width) - half_width) % self.width
+            sums += np.roll(rows[:, xs + size] - rows[:, xs], -dy, axis=0)
+        return sums
+
+    def _diamond_rows(self, radius):
+        """
+        :param radius: The Manhattan radius of the window
+        :return: (row offset, half width) pairs of the distinct rows a diamond of that radius covers
+        """
+        return [(dy, radius - abs(dy)) for dy in range(-((self.height - 1) // 2), self.height // 2 + 1)
+                if abs(dy) <= radius]
@@ -1,33 +1,92 @@
+import collections
+import numbers
 import queue
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 from . import constants
 from .entity import Entity, Shipyard, Ship, Dropoff
+from .danger import DangerMap
+from .fields import DistanceField, HaliteIntegral, diamond_kernel, toroidal_convolve
+from .pathfinding import Pathfinder
 from .player import Player
-from .positionals import Direction, Position
+from .positionals import Direction, Position, FrozenPosition
+from .spatial import SpatialIndex
 from .common import read_input
 
 
 class MapCell:
-    """A cell on the game map."""
-    def __init__(self, position, halite_amount):
+    """
+    A cell on the game map.
+
+    If the owning map keeps a NumPy halite grid, the cell's halite is stored
+    there and halite_amount reads from and writes to that grid. Cells given a
+    ship, whether by mark_unsafe or by setting ship directly, are recorded in
+    the map's marked-cells list so the map can clear them at the next update
+    without visiting every cell.
+
+    A cell marked from a player's ship columns keeps only the owner and
+    ship id; the Ship object is fetched from the player when ship is read.
+    """
+    def __init__(self, position, halite_amount, halite_grid=None, marked_cells=None):
         self.position = position
+        self._halite_grid = halite_grid
+        self._marked_cells = marked_cells
+        self._halite_amount = 0
         self.halite_amount = halite_amount
-        self.ship = None
+        self._ship = None
+        self._ship_source = None
         self.structure = None
 
+    @property
+    def ship(self):
+        """
+        :return: The ship on this cell, or None
+        """
+        if self._ship is None and self._ship_source is not None:
+            player, ship_id = self._ship_source
+            self._ship = player.get_ship(ship_id)
+        return self._ship
+
+    @ship.setter
+    def ship(self, ship):
+        if ship is not None:
+            self._record_marked()
+        self._ship = ship
+        self._ship_source = None
+
+    @property
+    def halite_amount(self):
+        """
+        :return: The amount of halite in this cell
+        """
+        if self._halite_grid is None:
+            return self._halite_amount
+        return int(self._halite_grid[self.position.y, self.position.x])
+
+    @halite_amount.setter
+    def halite_amount(self, halite_amount):
+        if self._halite_grid is None:
+            self._halite_amount = halite_amount
+        else:
+            self._halite_grid[self.position.y, self.position.x] = halite_amount
+
     @property
     def is_empty(self):
         """
         :return: Whether this cell has no ships or structures
         """
-        return self.ship is None and self.structure is None
+        return not self.is_occupied and self.structure is None
 
     @property
     def is_occupied(self):
         """
         :return: Whether this cell has any ships
         """
-        return self.ship is not None
+        return self._ship is not None or self._ship_source is not None
 
     @property
     def has_structure(self):
@@ -51,6 +110,23 @@ class MapCell:
         """
         self.ship = ship
 
+    def _mark_ship(self, player, ship_id):
+        """
+        Mark this cell as unsafe for a ship that is only known by its owner and id.
+        :param player: The Player owning the ship
+        :param ship_id: The ship's id
+        """
+        self._record_marked()
+        self._ship = None
+        self._ship_source = (player, ship_id)
+
+    def _record_marked(self):
+        """
+        Adds this cell to the map's marked-cells list if it is about to go from empty to occupied.
+        """
+        if not self.is_occupied and self._marked_cells is not None:
+            self._marked_cells.append(self)
+
     def __eq__(self, other):
         return self.position == other.position
 
@@ -67,16 +143,77 @@ class GameMap:
 
     Can be indexed by a position, or by a contained entity.
     Coordinates start at 0. Coordinates are normalized for you
+
+    When NumPy is available the halite of every cell is also held in a dense
+    int32 array (see halite_grid), indexed as [y, x].
+
+    Each cell's position is used as the map's interned position for that
+    cell: normalize, position and offset return these shared instances
+    instead of allocating new ones.
+
+    Cells can also be addressed by flat index, y * width + x (see index).
+    cell_at, position_at, halite_at and map[index] take flat indices, and
+    the neighbour tables give the flat index one step away in each
+    direction, so hot loops can run on integers without any allocation.
+    diamond and square give every cell's neighbourhood of a given radius as
+    flat indices, from one table per shape and radius; the most recently
+    used tables are cached.
     """
-    def __init__(self, cells, width, height):
+    # How many flat indices the cached diamond and square tables may hold in total (4 bytes each)
+    STENCIL_CACHE_CELLS = 1 << 22
+
+    def __init__(self, cells, width, height, halite_grid=None, marked_cells=None):
         self.width = width
         self.height = height
         self._cells = cells
+        self._positions = [[cell.position for cell in row] for row in cells]
+        self._flat_cells = [cell for row in cells for cell in row]
+        self._flat_positions = [cell.position for cell in self._flat_cells]
+        """The flat index one step from each cell, per direction (Still maps each cell to itself)."""
+        self.neighbour_tables = {
+            direction: [((y + direction[1]) % height) * width + (x + direction[0]) % width
+                        for y in range(height) for x in range(width)]
+            for direction in Direction.get_all_cardinals() + [Direction.Still]}
+        self._stencil_tables = collections.OrderedDict()
+        self._stencil_cells = 0
+        """The flat indices of each cell's neighbours, in Direction.get_all_cardinals() order."""
+        self.neighbours = [list(cell_neighbours) for cell_neighbours in
+                           zip(*(self.neighbour_tables[direction] for direction in Direction.get_all_cardinals()))]
+        # Wrap-around distance along each axis, indexed by the coordinate difference modulo the map size
+        self._x_distances = [min(dx, width - dx) for dx in range(width)]
+        self._y_distances = [min(dy, height - dy) for dy in range(height)]
+        if np is not None:
+            self._x_distance_array = np.array(self._x_distances, dtype=np.int32)
+            self._y_distance_array = np.array(self._y_distances, dtype=np.int32)
+        self._deposit_fields = {}
+        self._halite_integral = None
+        self._inspiration = {}
+        self._danger = {}
+        self._spatial_index = None
+        self._pathfinder = None
+        self._halite_grid = halite_grid
+        self._marked_cells = marked_cells
+
+    @property
+    def halite_grid(self):
+        """
+        :return: The (height, width) int32 NumPy array of halite per cell, or None if NumPy is unavailable.
+            The array is shared with the cells, so treat it as read-only unless you mean to change the map.
+        """
+        return self._halite_grid
+
+    def total_halite(self):
+        """
+        :return: The total amount of halite on the map
+        """
+        if self._halite_grid is not None:
+            return int(self._halite_grid.sum(dtype=np.int64))
+        return sum(cell.halite_amount for row in self._cells for cell in row)
 
     def __getitem__(self, location):
         """
         Getter for position object or entity objects within the game map
-        :param location: the position or entity to access in this map
+        :param location: the position, entity or flat index (any integral type) to access in this map
         :return: the contents housing that cell or entity
         """
         if isinstance(location, Position):
@@ -84,8 +221,126 @@ class GameMap:
             return self._cells[location.y][location.x]
         elif isinstance(location, Entity):
             return self._cells[location.position.y][location.position.x]
+        elif isinstance(location, numbers.Integral):
+            return self._flat_cells[location]
         return None
 
+    def index(self, position):
+        """
+        :param position: A position, normalized for you
+        :return: The flat index (y * width + x) of position
+        """
+        return (position.y % self.height) * self.width + position.x % self.width
+
+    def cell_at(self, index):
+        """
+        :param index: A flat index
+        :return: The cell at that index
+        """
+        return self._flat_cells[index]
+
+    def position_at(self, index):
+        """
+        :param index: A flat index
+        :return: The map's interned position for that index
+        """
+        return self._flat_positions[index]
+
+    def halite_at(self, index):
+        """
+        :param index: A flat index
+        :return: The amount of halite in the cell at that index
+        """
+        return self._flat_cells[index].halite_amount
+
+    def neighbour(self, index, direction):
+        """
+        :param index: A flat index
+        :param direction: The direction cardinal tuple
+        :return: The flat index one step from index in that direction
+        """
+        return self.neighbour_tables[direction][index]
+
+    def diamond(self, location, radius):
+        """
+        Get the cells within a Manhattan radius of a cell (the cell included), accounting for wrap-around.
+        :param location: A position or flat index (any integral type, including NumPy integers)
+        :param radius: The largest distance to include
+        :return: The flat indices, ordered by distance, each cell once: a read-only int32 NumPy array row of a
+            cached table, or a tuple if NumPy is unavailable
+        """
+        if not isinstance(location, numbers.Integral):
+            location = self.index(location)
+        return self._stencil("diamond", min(radius, self.width // 2 + self.height // 2), location)
+
+    def square(self, location, radius):
+        """
+        Get the cells within a Chebyshev radius of a cell, i.e. the (2 * radius + 1) wide square centred on it
+        (the cell included), accounting for wrap-around.
+        :param location: A position or flat index (any integral type, including NumPy integers)
+        :param radius: The largest distance along either axis to include
+        :return: The flat indices, row by row, each cell once: a read-only int32 NumPy array row of a cached
+            table, or a tuple if NumPy is unavailable
+        """
+        if not isinstance(location, numbers.Integral):
+            location = self.index(location)
+        return self._stencil("square", min(radius, max(self.width, self.height) // 2), location)
+
+    def _stencil_offsets(self, shape, radius):
+        """
+        :return: A list of the (dx, dy) offsets in a diamond or square of radius, diamonds ordered by distance,
+            without the repeats a radius wider than the map wraps onto
+        """
+        span = range(-radius, radius + 1)
+        if shape == "diamond":
+            offsets = sorted(((dx, dy) for dy in span for dx in span if abs(dx) + abs(dy) <= radius),
+                             key=lambda offset: (abs(offset[0]) + abs(offset[1]), offset[1], offset[0]))
+        else:
+            offsets = [(dx, dy) for dy in span for dx in span]
+        distinct = {}
+        for dx, dy in offsets:
+            distinct.setdefault((dx % self.width, dy % self.height), (dx, dy))
+        return list(distinct.values())
+
+    def _stencil(self, shape, radius, index):
+        """
+        Look up a cell's row of the (cells, stencil size) table for a shape and radius, building the table in one
+        vectorized pass on first use. Tables are evicted least recently used first once they hold more than
+        STENCIL_CACHE_CELLS indices in total; a table that alone would exceed that is not built, and its rows
+        are computed from the offsets on each call instead.
+        :return: The flat indices of the cells in a diamond or square of radius around index
+        """
+        width, height = self.width, self.height
+        x, y = index % width, index // width
+        if np is None:
+            return tuple(((y + dy) % height) * width + (x + dx) % width
+                         for dx, dy in self._stencil_offsets(shape, radius))
+
+        key = shape, radius
+        entry = self._stencil_tables.get(key)
+        if entry is None:
+            offsets = np.array(self._stencil_offsets(shape, radius), dtype=np.int32).reshape(-1, 2)
+            table = None
+            if width * height * len(offsets) <= self.STENCIL_CACHE_CELLS:
+                ys, xs = np.divmod(np.arange(width * height, dtype=np.int32), width)
+                table = ((ys[:, None] + offsets[:, 1]) % height) * width + (xs[:, None] + offsets[:, 0]) % width
+                table.flags.writeable = False
+            entry = offsets, table
+            self._stencil_tables[key] = entry
+            self._stencil_cells += (table if table is not None else offsets).size
+            while self._stencil_cells > self.STENCIL_CACHE_CELLS and len(self._stencil_tables) > 1:
+                old_offsets, old_table = self._stencil_tables.popitem(last=False)[1]
+                self._stencil_cells -= (old_table if old_table is not None else old_offsets).size
+        else:
+            self._stencil_tables.move_to_end(key)
+
+        offsets, table = entry
+        if table is not None:
+            return table[index]
+        row = ((y + offsets[:, 1]) % height) * width + (x + offsets[:, 0]) % width
+        row.flags.writeable = False
+        return row
+
     def calculate_distance(self, source, target):
         """
         Compute the Manhattan distance between two locations.
@@ -94,11 +349,141 @@ class GameMap:
         :param target: The target to where calculate
         :return: The distance between these items
         """
-        source = self.normalize(source)
-        target = self.normalize(target)
-        resulting_position = abs(source - target)
-        return min(resulting_position.x, self.width - resulting_position.x) + \
-            min(resulting_position.y, self.height - resulting_position.y)
+        return self._x_distances[(source.x - target.x) % self.width] + \
+            self._y_distances[(source.y - target.y) % self.height]
+
+    @property
+    def axis_distances(self):
+        """
+        The wrap-around distance along each axis, for hot loops that inline calculate_distance: the distance
+        between (x1, y1) and (x2, y2) is x_distances[(x1 - x2) % width] + y_distances[(y1 - y2) % height].
+        The lists are shared with the map, so do not modify them.
+        :return: A tuple of lists (x_distances, y_distances)
+        """
+        return self._x_distances, self._y_distances
+
+    def distances_from(self, position):
+        """
+        Compute the Manhattan distance from one location to every cell of the map at once.
+        Accounts for wrap-around. Requires NumPy.
+        :param position: The source from where to calculate
+        :return: A (height, width) int32 NumPy array of distances, indexed as [y, x]
+        """
+        if np is None:
+            raise ImportError("distances_from requires numpy")
+        return np.add.outer(np.roll(self._y_distance_array, position.y % self.height),
+                            np.roll(self._x_distance_array, position.x % self.width))
+
+    def deposit_field(self, player):
+        """
+        Get the distance field to the nearest of a player's shipyard and dropoffs. Requires NumPy.
+        The field is cached and only recomputed when the player's dropoffs change.
+        :param player: The player whose structures to measure from
+        :return: A DistanceField over the player's shipyard followed by its dropoffs
+        """
+        if np is None:
+            raise ImportError("deposit_field requires numpy")
+        structures = [player.shipyard] + player.get_dropoffs()
+        key = tuple((structure.position.x, structure.position.y) for structure in structures)
+        cached = self._deposit_fields.get(player.id)
+        if cached is None or cached[0] != key:
+            cached = key, DistanceField(self, structures)
+            self._deposit_fields[player.id] = cached
+        return cached[1]
+
+    def halite_integral(self):
+        """
+        Get the summed-area table over this map's halite, for fast rectangle and diamond window sums.
+        Requires NumPy. The table is built on first use and then kept current as the map updates.
+        :return: The map's HaliteIntegral
+        """
+        if np is None:
+            raise ImportError("halite_integral requires numpy")
+        if self._halite_integral is None:
+            self._halite_integral = HaliteIntegral(self._halite_grid)
+        return self._halite_integral
+
+    def inspiration(self, player, players, radius=None):
+        """
+        Count the opponent ships within a Manhattan radius of every cell, with one toroidal convolution of the
+        opponents' ship occupancy. Requires NumPy. Counts are cached until the next map update.
+        :param player: The player whose opponents to count
+        :param players: All players (e.g. game.players.values())
+        :param radius: The radius to count within (constants.INSPIRATION_RADIUS if None)
+        :return: A (height, width) int64 NumPy array of opponent ship counts, indexed as [y, x]
+        """
+        if np is None:
+            raise ImportError("inspiration requires numpy")
+        if radius is None:
+            radius = constants.INSPIRATION_RADIUS
+        key = player.id, radius
+        counts = self._inspiration.get(key)
+        if counts is None:
+            occupancy = np.zeros((self.height, self.width), dtype=np.int64)
+            for other in players:
+                if other.id != player.id:
+                    _, xs, ys, _ = other.ship_arrays()
+                    np.add.at(occupancy, (ys, xs), 1)
+            counts = toroidal_convolve(occupancy, diamond_kernel(self.width, self.height, radius))
+            self._inspiration[key] = counts
+        return counts
+
+    def danger(self, player, players, max_distance=2):
+        """
+        Get the opponent danger map: opponent ships and their cargo at each distance from every cell.
+        Requires NumPy. The map is built on first use each turn and cached until the next map update.
+        :param player: The player whose opponents to count
+        :param players: All players (e.g. game.players.values())
+        :param max_distance: The largest distance to count ships at
+        :return: A DangerMap
+        """
+        if np is None:
+            raise ImportError("danger requires numpy")
+        key = player.id, max_distance
+        danger = self._danger.get(key)
+        if danger is None:
+            danger = DangerMap(self, player, players, max_distance)
+            self._danger[key] = danger
+        return danger
+
+    def spatial_index(self, players):
+        """
+        Get the spatial index over every player's ships and structures, for radius and k-nearest queries.
+        The index is built on first use each turn and cached until the next map update.
+        :param players: All players (e.g. game.players.values())
+        :return: A SpatialIndex
+        """
+        if self._spatial_index is None:
+            self._spatial_index = SpatialIndex(self, players)
+        return self._spatial_index
+
+    def inspired(self, player, players):
+        """
+        Find the cells where a ship of player would be inspired. Requires NumPy.
+        :param player: The player whose ships to consider
+        :param players: All players (e.g. game.players.values())
+        :return: A (height, width) bool NumPy array, indexed as [y, x]
+        """
+        if np is None:
+            raise ImportError("inspired requires numpy")
+        if not constants.INSPIRATION_ENABLED:
+            return np.zeros((self.height, self.width), dtype=bool)
+        return self.inspiration(player, players) >= constants.INSPIRATION_SHIP_COUNT
+
+    def mining_yield(self, player, players):
+        """
+        The halite a ship of player would collect by staying one turn on each cell, including the inspired
+        extract ratio and bonus, before any cap from the ship's free space. Requires NumPy.
+        :param player: The player whose ships to consider
+        :param players: All players (e.g. game.players.values())
+        :return: A (height, width) int64 NumPy array, indexed as [y, x]
+        """
+        inspired = self.inspired(player, players)
+        halite = self._halite_grid.astype(np.int64)
+        extracted = -(-halite // constants.EXTRACT_RATIO)
+        inspired_extracted = -(-halite // constants.INSPIRED_EXTRACT_RATIO)
+        bonus = (inspired_extracted * constants.INSPIRED_BONUS_MULTIPLIER).astype(np.int64)
+        return np.where(inspired, inspired_extracted + bonus, extracted)
 
     def normalize(self, position):
         """
@@ -107,9 +492,26 @@ class GameMap:
         height bounds, and places it within those bounds considering
         wraparound.
         :param position: A position object.
-        :return: A normalized position object fitting within the bounds of the map
+        :return: The map's interned (immutable) position for that cell
+        """
+        return self._positions[position.y % self.height][position.x % self.width]
+
+    def position(self, x, y):
+        """
+        :param x: The x coordinate, wrapped around the map if needed
+        :param y: The y coordinate, wrapped around the map if needed
+        :return: The map's interned (immutable) position for that cell
         """
-        return Position(position.x % self.width, position.y % self.height)
+        return self._positions[y % self.height][x % self.width]
+
+    def offset(self, position, direction):
+        """
+        Like Position.directional_offset, but normalized and without allocating.
+        :param position: The starting position
+        :param direction: The direction cardinal tuple
+        :return: The map's interned position one step from position in that direction
+        """
+        return self._positions[(position.y + direction[1]) % self.height][(position.x + direction[0]) % self.width]
 
     @staticmethod
     def _get_target_direction(source, target):
@@ -157,13 +559,57 @@ class GameMap:
         # No need to normalize destination, since get_unsafe_moves
         # does that
         for direction in self.get_unsafe_moves(ship.position, destination):
-            target_pos = ship.position.directional_offset(direction)
+            target_pos = self.offset(ship.position, direction)
             if not self[target_pos].is_occupied:
                 self[target_pos].mark_unsafe(ship)
                 return direction
 
         return Direction.Still
 
+    @property
+    def pathfinder(self):
+        """
+        :return: This map's Pathfinder; its cached cost-to-go fields are cleared on every map update
+        """
+        if self._pathfinder is None:
+            self._pathfinder = Pathfinder(self)
+        return self._pathfinder
+
+    def navigate(self, ship, destination, avoid=None):
+        """
+        Returns a singular safe move along the cheapest halite-aware path towards the destination.
+        Unlike naive_navigate, it detours around occupied, avoided or expensive cells when that is cheaper,
+        and stays still when the ship cannot pay to move.
+
+        :param ship: The ship to move.
+        :param destination: Ending position
+        :param avoid: Positions the path must not pass through, such as cells next to enemy ships
+        :return: A direction.
+        """
+        if ship.halite_amount < self.pathfinder.move_costs()[self.pathfinder.index(ship.position)]:
+            return Direction.Still
+
+        for direction, _ in self.pathfinder.get_moves(ship.position, destination, avoid):
+            if direction == Direction.Still:
+                break
+            target_pos = self.offset(ship.position, direction)
+            if not self[target_pos].is_occupied:
+                self[target_pos].mark_unsafe(ship)
+                return direction
+
+        return Direction.Still
+
+    def mark_ships(self, player):
+        """
+        Marks the cells under a player's ships as unsafe without building the Ship objects;
+        a cell's ship is built when it is first read. Game.update_frame does this for every player.
+        :param player: The player whose ships to mark
+        :return: nothing.
+        """
+        ship_ids, ship_x, ship_y, _ = player.ship_columns()
+        for ship_id, x, y in zip(ship_ids, ship_x, ship_y):
+            self._cells[y][x]._mark_ship(player, ship_id)
+
     @staticmethod
     def _generate():
         """
@@ -171,25 +617,69 @@ class GameMap:
         :return: The map object
         """
         map_width, map_height = map(int, read_input().split())
+        halite_grid = np.zeros((map_height, map_width), dtype=np.int32) if np is not None else None
+        marked_cells = []
         game_map = [[None for _ in range(map_width)] for _ in range(map_height)]
         for y_position in range(map_height):
             cells = read_input().split()
             for x_position in range(map_width):
-                game_map[y_position][x_position] = MapCell(Position(x_position, y_position),
-                                                           int(cells[x_position]))
-        return GameMap(game_map, map_width, map_height)
+                game_map[y_position][x_position] = MapCell(FrozenPosition(x_position, y_position),
+                                                           int(cells[x_position]),
+                                                           halite_grid, marked_cells)
+        return GameMap(game_map, map_width, map_height, halite_grid, marked_cells)
+
+    def _clear_ships(self):
+        """
+        Marks cells as safe for navigation again (unsafe cells are re-marked later).
+        Only the cells marked since the last clear are visited, so the cost follows the number of ships
+        rather than the map area.
+        :return: nothing
+        """
+        if self._marked_cells is None:
+            for row in self._cells:
+                for cell in row:
+                    cell.ship = None
+            return
+
+        for cell in self._marked_cells:
+            cell.ship = None
+        self._marked_cells.clear()
 
     def _update(self):
         """
         Updates this map object from the input given by the game engine
         :return: nothing
         """
-        # Mark cells as safe for navigation (will re-mark unsafe cells
-        # later)
-        for y in range(self.height):
-            for x in range(self.width):
-                self[Position(x, y)].ship = None
+        self._clear_ships()
+        self._inspiration.clear()
+        self._danger.clear()
+        self._spatial_index = None
+        if self._pathfinder is not None:
+            self._pathfinder.clear()
+
+        changed_cells = [tuple(map(int, read_input().split())) for _ in range(int(read_input()))]
+        if self._halite_integral is not None and changed_cells:
+            self._halite_integral.update(*zip(*changed_cells))
+        for cell_x, cell_y, cell_energy in changed_cells:
+            self._cells[cell_y][cell_x].halite_amount = cell_energy
+
+    def _update_from_frame(self, frame, offset):
+        """
+        Updates this map object from an already decoded frame (see networking.BulkFrameReader).
+        Needs the NumPy halite grid.
+        :param frame: The frame's integers
+        :param offset: Index of the changed-cell count in frame
+        :return: nothing
+        """
+        self._clear_ships()
+        self._inspiration.clear()
+        self._danger.clear()
+        self._spatial_index = None
+        if self._pathfinder is not None:
+            self._pathfinder.clear()
 
-        for _ in range(int(read_input())):
-            cell_x, cell_y, cell_energy = map(int, read_input().split())
-            self[Position(cell_x, cell_y)].halite_amount = cell_energy
+        num_cells = int(frame[offset])
+        cells = frame[offset + 1:offset + 1 + 3 * num_cells].reshape(-1, 3)
+        if self._halite_integral is not None and num_cells:
+            self._halite_integral.update(cells[:, 0], cells[:, 1], cells[:, 2])
+        self._halite_grid[cells[:, 1], cells[:, 0]] = cells[:, 2]
@@ -1,46 +1,94 @@
+import atexit
 import json
 import logging
+import os
+import random
 import sys
+import time
 
-from .common import read_input
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .common import read_input, read_input_bytes
 from . import constants
 from .game_map import GameMap, Player
+from .timing import TurnTimer
+
+if np is not None:
+    from .replay import ReplayRecorder
+
+"""Environment variable Game reads a record_replay path from, so any bot can be recorded without editing it."""
+RECORD_REPLAY_ENV = "HLT_RECORD_REPLAY"
 
 
 class Game:
     """
     The game object holds all metadata pertinent to the game and all its contents
     """
-    def __init__(self):
+    def __init__(self, bulk_frames=False, log_level=logging.INFO, turn_budget=2.0, timing_summary_every=50,
+                 record_replay=None, replay_checkpoint_every=25):
         """
         Initiates a game object collecting all start-state instances for the contained items for pre-game.
         Also sets up basic logging.
+        :param bulk_frames: If True, read each turn's frame from stdin in one go and decode it with NumPy
+            (see BulkFrameReader) instead of line by line. Requires NumPy.
+        :param log_level: The level of the bot log file. At the default, logging.INFO, the SDK only logs slow-turn
+            warnings and the periodic timing summary; logging.DEBUG adds the per-turn banner and debug output
+        :param turn_budget: The engine's time limit per turn, in seconds, for time_remaining()
+        :param timing_summary_every: Log a turn timing summary every this many turns (0 to never log)
+        :param record_replay: A .npz path to record everything read and sent to (see hlt.replay), written when the
+            bot exits, with the turns since the last checkpoint appended next to it every replay_checkpoint_every
+            turns. "{player}" in the path is replaced with this bot's player id. If None, the HLT_RECORD_REPLAY
+            environment variable is used when set. The random module is seeded with a fresh seed that is saved in
+            the replay, so the bot's random choices can be replayed. Requires NumPy.
+        :param replay_checkpoint_every: How often to checkpoint the replay, in turns (0 to only write at exit)
         """
+        if record_replay is None:
+            record_replay = os.environ.get(RECORD_REPLAY_ENV) or None
+        if (bulk_frames or record_replay) and np is None:
+            raise ImportError("bulk_frames and record_replay require numpy")
         self.turn_number = 0
+        self._recorder = None
+        if record_replay:
+            self._recorder = ReplayRecorder(record_replay, replay_checkpoint_every)
+            self._recorder.seed = int.from_bytes(os.urandom(4), "little")
+            random.seed(self._recorder.seed)
+            self._recorder.start()
+            atexit.register(self._recorder.save)
 
         # Grab constants JSON
         raw_constants = read_input()
         constants.load_constants(json.loads(raw_constants))
 
         num_players, self.my_id = map(int, read_input().split())
+        if self._recorder is not None:
+            self._recorder.path = self._recorder.path.replace("{player}", str(self.my_id))
 
         logging.basicConfig(
             filename="bot-{}.log".format(self.my_id),
             filemode="w",
-            level=logging.DEBUG,
+            level=log_level,
         )
+        self.timer = TurnTimer(turn_budget, summary_every=timing_summary_every)
 
         self.players = {}
         for player in range(num_players):
             self.players[player] = Player._generate()
         self.me = self.players[self.my_id]
         self.game_map = GameMap._generate()
+        self._frame_reader = BulkFrameReader(num_players) if bulk_frames else None
+        if self._recorder is not None:
+            self._recorder.record_init()
 
     def ready(self, name):
         """
         Indicate that your bot is ready to play.
         :param name: The name of your bot
         """
+        if self._recorder is not None:
+            self._recorder.name = name
         send_commands([name])
 
     def update_frame(self):
@@ -48,32 +96,88 @@ class Game:
         Updates the game object's state.
         :returns: nothing.
         """
-        self.turn_number = int(read_input())
-        logging.info("=============== TURN {:03} ================".format(self.turn_number))
+        if self._frame_reader is not None:
+            self._update_frame_bulk()
+        else:
+            self.turn_number = int(read_input())
+            self.timer.frame_received()
+            logging.debug("=============== TURN {:03} ================".format(self.turn_number))
 
-        for _ in range(len(self.players)):
-            player, num_ships, num_dropoffs, halite = map(int, read_input().split())
-            self.players[player]._update(num_ships, num_dropoffs, halite)
+            for _ in range(len(self.players)):
+                player, num_ships, num_dropoffs, halite = map(int, read_input().split())
+                self.players[player]._update(num_ships, num_dropoffs, halite)
 
-        self.game_map._update()
+            self.game_map._update()
+            if self._recorder is not None:
+                self._recorder.record_frame()
 
         # Mark cells with ships as unsafe for navigation
         for player in self.players.values():
-            for ship in player.get_ships():
-                self.game_map[ship.position].mark_unsafe(ship)
+            self.game_map.mark_ships(player)
 
             self.game_map[player.shipyard.position].structure = player.shipyard
             for dropoff in player.get_dropoffs():
                 self.game_map[dropoff.position].structure = dropoff
 
-    @staticmethod
-    def end_turn(commands):
+        self.timer.frame_parsed()
+
+    def _update_frame_bulk(self):
+        """
+        Updates the players and the map from a whole frame read and decoded at once.
+        :return: nothing.
+        """
+        frame = self._frame_reader.read_frame()
+        self.timer.frame_received(self._frame_reader.received_at)
+        if self._recorder is not None:
+            self._recorder.record_frame(frame)
+        self.turn_number = int(frame[0])
+        logging.debug("=============== TURN {:03} ================".format(self.turn_number))
+
+        offset = 1
+        for _ in range(len(self.players)):
+            player, num_ships, num_dropoffs, halite = frame[offset:offset + 4].tolist()
+            offset = self.players[player]._update_from_frame(frame, offset + 4, num_ships, num_dropoffs, halite)
+
+        self.game_map._update_from_frame(frame, offset)
+
+    def end_turn(self, commands):
         """
         Method to send all commands to the game engine, effectively ending your turn.
         :param commands: Array of commands to send to engine
         :return: nothing.
         """
+        self.timer.commands_ready()
+        if self._recorder is not None:
+            self._recorder.record_commands(commands)
         send_commands(commands)
+        self.timer.commands_sent(self.turn_number)
+        if self._recorder is not None:
+            self._recorder.checkpoint()
+
+    def time_remaining(self):
+        """
+        :return: Seconds left of this turn's time budget, counted from when the turn's frame arrived.
+            Strategies can check it to cut work short before the engine times the bot out.
+        """
+        return self.timer.time_remaining()
+
+    def enemy_ship_arrays(self):
+        """
+        Every opponent ship as NumPy columns, without building Ship objects. Requires NumPy.
+        :return: A tuple of int32 arrays (owners, ids, x, y, cargo)
+        """
+        if np is None:
+            raise ImportError("enemy_ship_arrays requires numpy")
+        owners, columns = [], []
+        for player in self.players.values():
+            if player.id == self.my_id:
+                continue
+            arrays = player.ship_arrays()
+            owners.append(np.full(len(arrays[0]), player.id, dtype=np.int32))
+            columns.append(arrays)
+        if not columns:
+            return tuple(np.zeros(0, dtype=np.int32) for _ in range(5))
+        return (np.concatenate(owners),) + tuple(np.concatenate(column) for column in zip(*columns))
 
 
 def send_commands(commands):
@@ -84,3 +188,72 @@ def send_commands(commands):
     """
     print(" ".join(commands))
     sys.stdout.flush()
+
+
+class BulkFrameReader:
+    """
+    Reads a whole turn frame from stdin at once and decodes every integer in it with one NumPy pass.
+
+    The engine sends nothing after a frame until it gets our commands, so the reader pulls raw bytes until
+    the frame's own header counts say it is complete. Any bytes past the frame are kept for the next one.
+    """
+    _CHUNK_SIZE = 1 << 16
+
+    def __init__(self, num_players):
+        """
+        :param num_players: The number of player sections in each frame
+        """
+        self.num_players = num_players
+        """The perf_counter time the last frame read started arriving."""
+        self.received_at = None
+        self._buffer = b""
+
+    def read_frame(self):
+        """
+        Reads one frame.
+        :return: A 1-D int64 NumPy array holding the frame's integers in engine order.
+        """
+        self.received_at = time.perf_counter() if self._buffer else None
+        while True:
+            end = self._buffer.rfind(b"\n") + 1
+            ints = np.fromstring(self._buffer[:end], dtype=np.int64, sep=" ")
+            size = self._frame_size(ints)
+            if size is not None:
+                if size == len(ints):
+                    self._buffer = self._buffer[end:]
+                else:
+                    self._consume(size)
+                return ints[:size]
+            self._buffer += read_input_bytes(self._CHUNK_SIZE)
+            if self.received_at is None:
+                self.received_at = time.perf_counter()
+
+    def _frame_size(self, ints):
+        """
+        :param ints: The integers decoded so far
+        :return: How many of them make up the frame, or None if the frame is not complete yet
+        """
+        offset = 1
+        for _ in range(self.num_players):
+            if len(ints) < offset + 4:
+                return None
+            num_ships, num_dropoffs = int(ints[offset + 1]), int(ints[offset + 2])
+            offset += 4 + 4 * num_ships + 3 * num_dropoffs
+        if len(ints) <= offset:
+            return None
+        offset += 1 + 3 * int(ints[offset])
+        return offset if len(ints) >= offset else None
+
+    def _consume(self, count):
+        """
+        Drops the lines holding the first count integers from the buffer. Only needed when more than one
+        frame has been buffered.
+        :param count: The number of integers to drop
+        """
+        tokens = 0
+        position = 0
+        while tokens < count:
+            line_end = self._buffer.index(b"\n", position) + 1
+            tokens += len(self._buffer[position:line_end].split())
+            position = line_end
+        self._buffer = self._buffer[position:]
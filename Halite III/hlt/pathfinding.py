@@ -0,0 +1,153 @@
+"""
+Halite-aware shortest paths over the toroidal map.
+
+Cells are addressed by flat index (y * width + x). The cost of a move is a fixed per-turn cost plus the halite
+burned leaving the cell (1/MOVE_COST_RATIO of its halite, truncated), so paths detour around rich cells when it
+is cheaper. Cells can be marked to avoid (e.g. next to enemy ships).
+"""
+import heapq
+
+from . import constants
+from .positionals import Direction
+
+INFINITY = float("inf")
+
+
+class Pathfinder:
+    """
+    Cached Dijkstra cost-to-go fields for one game map, and the paths and ranked moves read from them.
+
+    Cost-to-go fields are cached per target and avoid set until clear() is called; GameMap clears its
+    pathfinder on every update, so the cache lives for one turn.
+    """
+    def __init__(self, game_map, turn_cost=10):
+        """
+        :param game_map: The game map
+        :param turn_cost: The cost of spending one turn on a move, in halite; must be positive
+        """
+        if turn_cost <= 0:
+            raise ValueError("turn_cost must be positive, not {}".format(turn_cost))
+        self._game_map = game_map
+        self.width = game_map.width
+        self.height = game_map.height
+        self.turn_cost = turn_cost
+        self._cardinals = Direction.get_all_cardinals()
+        self._neighbours = game_map.neighbours
+        self._burn = None
+        self._fields = {}
+
+    def clear(self):
+        """
+        Forgets the cached fields and move costs. Call after the map's halite changes.
+        :return: nothing
+        """
+        self._burn = None
+        self._fields = {}
+
+    def move_costs(self):
+        """
+        :return: A flat list of the halite burned leaving each cell
+        """
+        if self._burn is None:
+            halite_grid = self._game_map.halite_grid
+            if halite_grid is not None:
+                halite = halite_grid.ravel().tolist()
+            else:
+                halite = [self._game_map.halite_at(index) for index in range(self.width * self.height)]
+            self._burn = [amount // constants.MOVE_COST_RATIO for amount in halite]
+        return self._burn
+
+    def index(self, position):
+        """
+        :param position: A position, normalized for you
+        :return: The flat index of position
+        """
+        return self._game_map.index(position)
+
+    def _blocked(self, avoid):
+        """
+        :param avoid: Positions not to enter, or None
+        :return: A frozenset of flat indices not to enter
+        """
+        return frozenset(self.index(position) for position in avoid) if avoid else frozenset()
+
+    def find_path(self, source, target, avoid=None):
+        """
+        Find the cheapest path by walking down target's cost-to-go field, so paths to the same target share one
+        cached Dijkstra run and each path only costs its own length.
+        :param source: The starting position
+        :param target: The destination
+        :param avoid: Positions the path must not pass through (the target is always allowed)
+        :return: A list of Directions from source to target, empty if they are the same cell,
+            or None if target cannot be reached
+        """
+        current = self.index(source)
+        goal = self.index(target)
+        field = self.cost_to_go(target, avoid)
+        neighbours = self._neighbours
+        path = []
+        while current != goal:
+            # Every reachable cell has a neighbour whose cost is lower by at least turn_cost, so the walk ends
+            slot, current = min(enumerate(neighbours[current]), key=lambda item: field[item[1]])
+            if field[current] == INFINITY:
+                return None
+            path.append(self._cardinals[slot])
+        return path
+
+    def cost_to_go(self, target, avoid=None):
+        """
+        Cost of the cheapest path from every cell to target, computed with Dijkstra from the target and cached.
+        :param target: The destination
+        :param avoid: Positions paths must not pass through (the target is always allowed)
+        :return: A flat list of costs indexed by y * width + x; unreachable cells cost infinity
+        """
+        goal = self.index(target)
+        blocked = self._blocked(avoid)
+        key = goal, blocked
+        field = self._fields.get(key)
+        if field is not None:
+            return field
+
+        burn = self.move_costs()
+        neighbours = self._neighbours
+        turn_cost = self.turn_cost
+        field = [INFINITY] * (self.width * self.height)
+        field[goal] = 0
+        frontier = [(0, goal)]
+        while frontier:
+            cost, current = heapq.heappop(frontier)
+            if cost > field[current]:
+                continue
+            for neighbour in neighbours[current]:
+                if neighbour in blocked:
+                    continue
+                step = cost + burn[neighbour] + turn_cost
+                if step < field[neighbour]:
+                    field[neighbour] = step
+                    heapq.heappush(frontier, (step, neighbour))
+
+        self._fields[key] = field
+        return field
+
+    def get_moves(self, source, target, avoid=None):
+        """
+        Rank the moves from source by the cost of reaching target after making them.
+        :param source: The starting position
+        :param target: The destination
+        :param avoid: Positions paths must not pass through (the target is always allowed)
+        :return: A list of (Direction, cost) pairs, cheapest first, including Direction.Still when source is
+            not the target. Moves that cannot reach the target are left out.
+        """
+        start = self.index(source)
+        goal = self.index(target)
+        if start == goal:
+            return [(Direction.Still, 0)]
+        field = self.cost_to_go(target, avoid)
+        step = self.move_costs()[start] + self.turn_cost
+        moves = [(direction, step + field[neighbour])
+                 for direction, neighbour in zip(self._cardinals, self._neighbours[start])
+                 if field[neighbour] < INFINITY]
+        if field[start] < INFINITY:
+            moves.append((Direction.Still, self.turn_cost + field[start]))
+        moves.sort(key=lambda move: move[1])
+        return moves
@@ -1,3 +1,8 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 from .entity import Shipyard, Ship, Dropoff
 from .positionals import Position
 from .common import read_input
@@ -5,6 +10,17 @@ from .common import read_input
 class Player:
     """
     Player object containing all items/metadata pertinent to the player.
+
+    Ships and dropoffs are stored as columns (ids, x, y and cargo) read
+    straight from the frame; Ship and Dropoff objects are only built when
+    get_ship, get_ships, get_dropoff or get_dropoffs asks for them.
+    ship_arrays gives the columns as NumPy arrays for vectorized use.
+
+    Entities keep their identity across turns: a Ship or Dropoff that has
+    been built is updated in place for as long as its id is in the frame,
+    so anything stored on it (see Ship.state) carries over. Each update
+    also records which ships were spawned, lost and deposited their cargo
+    (spawned_ships, lost_ships and deposits).
     """
     def __init__(self, player_id, shipyard, halite=0):
         self.id = player_id
@@ -12,6 +28,13 @@ class Player:
         self.halite_amount = halite
         self._ships = {}
         self._dropoffs = {}
+        self._ship_rows, self._ship_x, self._ship_y, self._ship_cargo = {}, [], [], []
+        self._set_ships([])
+        self._set_dropoffs([])
+        self._spawned_ids = []
+        self._deposited = []
+        """The ships lost since the previous turn (destroyed or turned into dropoffs), as last seen."""
+        self.lost_ships = []
 
     def get_ship(self, ship_id):
         """
@@ -19,13 +42,18 @@ class Player:
         :param ship_id: The ship id of the ship you wish to return
         :return: the ship object.
         """
-        return self._ships[ship_id]
+        ship = self._ships.get(ship_id)
+        if ship is None:
+            row = self._ship_rows[ship_id]
+            ship = Ship(self.id, ship_id, Position(self._ship_x[row], self._ship_y[row]), self._ship_cargo[row])
+            self._ships[ship_id] = ship
+        return ship
 
     def get_ships(self):
         """
         :return: Returns all ship objects in a list
         """
-        return list(self._ships.values())
+        return [self.get_ship(ship_id) for ship_id in self._ship_ids]
 
     def get_dropoff(self, dropoff_id):
         """
@@ -33,13 +61,67 @@ class Player:
         :param dropoff_id: The dropoff id to return
         :return: The dropoff object
         """
-        return self._dropoffs[dropoff_id]
+        dropoff = self._dropoffs.get(dropoff_id)
+        if dropoff is None:
+            row = self._dropoff_rows[dropoff_id]
+            dropoff = Dropoff(self.id, dropoff_id, Position(self._dropoff_x[row], self._dropoff_y[row]))
+            self._dropoffs[dropoff_id] = dropoff
+        return dropoff
 
     def get_dropoffs(self):
         """
         :return: Returns all dropoff objects in a list
         """
-        return list(self._dropoffs.values())
+        return [self.get_dropoff(dropoff_id) for dropoff_id in self._dropoff_ids]
+
+    @property
+    def num_ships(self):
+        """
+        :return: How many ships the player has this turn
+        """
+        return len(self._ship_ids)
+
+    def ship_columns(self):
+        """
+        All of this player's ships as plain columns, without building Ship objects or needing NumPy.
+        The lists are shared with the player and replaced at the next update, so do not modify them.
+        :return: A tuple of lists (ids, x, y, cargo), in the engine's ship order
+        """
+        return self._ship_ids, self._ship_x, self._ship_y, self._ship_cargo
+
+    def dropoff_columns(self):
+        """
+        All of this player's dropoffs as plain columns, without building Dropoff objects.
+        The lists are shared with the player and replaced at the next update, so do not modify them.
+        :return: A tuple of lists (ids, x, y), in the engine's dropoff order
+        """
+        return self._dropoff_ids, self._dropoff_x, self._dropoff_y
+
+    def ship_arrays(self):
+        """
+        All of this player's ships as NumPy columns, without building Ship objects.
+        :return: A tuple of int32 arrays (ids, x, y, cargo), in the engine's ship order
+        """
+        if np is None:
+            raise ImportError("ship_arrays requires numpy")
+        if self._ship_arrays is None:
+            self._ship_arrays = tuple(np.array(column, dtype=np.int32) for column in self.ship_columns())
+        return self._ship_arrays
+
+    @property
+    def spawned_ships(self):
+        """
+        :return: The ships that appeared this turn, in a list
+        """
+        return [self.get_ship(ship_id) for ship_id in self._spawned_ids]
+
+    @property
+    def deposits(self):
+        """
+        Ships that reached one of this player's shipyard or dropoffs this turn and emptied their cargo there.
+        :return: A list of (ship, cargo) pairs, cargo being what the ship carried the turn before
+        """
+        return [(self.get_ship(ship_id), cargo) for ship_id, cargo in self._deposited]
 
     def has_ship(self, ship_id):
         """
@@ -51,7 +133,7 @@ class Player:
         :param ship_id: The ID to check.
         :return: True if and only if the ship exists.
         """
-        return ship_id in self._ships
+        return ship_id in self._ship_rows
 
 
     @staticmethod
@@ -72,5 +154,86 @@ class Player:
         :return: nothing.
         """
         self.halite_amount = halite
-        self._ships = {id: ship for (id, ship) in [Ship._generate(self.id) for _ in range(num_ships)]}
-        self._dropoffs = {id: dropoff for (id, dropoff) in [Dropoff._generate(self.id) for _ in range(num_dropoffs)]}
+        ships = list(map(int, " ".join(read_input() for _ in range(num_ships)).split()))
+        self._set_dropoffs(list(map(int, " ".join(read_input() for _ in range(num_dropoffs)).split())))
+        self._set_ships(ships)
+        self._record_events()
+
+    def _update_from_frame(self, frame, offset, num_ships, num_dropoffs, halite):
+        """
+        Updates this player object from an already decoded frame (see networking.BulkFrameReader).
+        :param frame: The frame's integers
+        :param offset: Index of this player's first ship integer in frame
+        :param num_ships: The number of ships this player has this turn
+        :param num_dropoffs: The number of dropoffs this player has this turn
+        :param halite: How much halite the player has in total
+        :return: The index just past this player's section of the frame.
+        """
+        self.halite_amount = halite
+        ships_end = offset + 4 * num_ships
+        dropoffs_end = ships_end + 3 * num_dropoffs
+        self._set_dropoffs(frame[ships_end:dropoffs_end].tolist())
+        self._set_ships(frame[offset:ships_end].tolist())
+        self._record_events()
+        return dropoffs_end
+
+    def _set_ships(self, values):
+        """
+        Replaces this player's ship columns, keeping the previous turn's for _record_events,
+        and updates the Ship objects already built in place.
+        :param values: The flat ship integers of a frame: id, x, y and cargo for each ship
+        :return: nothing.
+        """
+        self._previous_ships = self._ship_rows, self._ship_x, self._ship_y, self._ship_cargo, self._ships
+        self._ship_ids = values[0::4]
+        self._ship_x = values[1::4]
+        self._ship_y = values[2::4]
+        self._ship_cargo = values[3::4]
+        self._ship_rows = dict(zip(self._ship_ids, range(len(self._ship_ids))))
+        self._ship_arrays = None
+
+        built = self._ships
+        self._ships = {}
+        for ship_id, ship in built.items():
+            row = self._ship_rows.get(ship_id)
+            if row is not None:
+                ship.position = Position(self._ship_x[row], self._ship_y[row])
+                ship.halite_amount = self._ship_cargo[row]
+                self._ships[ship_id] = ship
+
+    def _set_dropoffs(self, values):
+        """
+        Replaces this player's dropoff columns.
+        :param values: The flat dropoff integers of a frame: id, x and y for each dropoff
+        :return: nothing.
+        """
+        self._dropoff_ids = values[0::3]
+        self._dropoff_x = values[1::3]
+        self._dropoff_y = values[2::3]
+        self._dropoff_rows = dict(zip(self._dropoff_ids, range(len(self._dropoff_ids))))
+        self._dropoffs = {dropoff_id: dropoff for dropoff_id, dropoff in self._dropoffs.items()
+                          if dropoff_id in self._dropoff_rows}
+
+    def _record_events(self):
+        """
+        Works out the ships spawned, lost and deposited between the previous ship columns and the current ones.
+        :return: nothing.
+        """
+        previous_rows, previous_x, previous_y, previous_cargo, previous_ships = self._previous_ships
+        self._spawned_ids = sorted(self._ship_rows.keys() - previous_rows.keys())
+        self.lost_ships = []
+        for ship_id in sorted(previous_rows.keys() - self._ship_rows.keys()):
+            ship = previous_ships.get(ship_id)
+            if ship is None:
+                row = previous_rows[ship_id]
+                ship = Ship(self.id, ship_id, Position(previous_x[row], previous_y[row]), previous_cargo[row])
+            self.lost_ships.append(ship)
+
+        structures = set(zip(self._dropoff_x, self._dropoff_y))
+        structures.add((self.shipyard.position.x, self.shipyard.position.y))
+        self._deposited = []
+        for ship_id, x, y, cargo in zip(self._ship_ids, self._ship_x, self._ship_y, self._ship_cargo):
+            if cargo == 0 and (x, y) in structures:
+                row = previous_rows.get(ship_id)
+                if row is not None and previous_cargo[row] > 0:
+                    self._deposited.append((ship_id, previous_cargo[row]))
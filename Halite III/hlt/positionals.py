@@ -62,6 +62,8 @@ class Direction:
 
 
 class Position:
+    __slots__ = ("x", "y")
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -109,3 +111,34 @@ class Position:
         return "{}({}, {})".format(self.__class__.__name__,
                                    self.x,
                                    self.y)
+
+
+class FrozenPosition(Position):
+    """
+    An immutable, hashable Position.
+
+    Compares equal to a Position with the same coordinates, and can be used as a dict key or set member.
+    GameMap keeps one normalized instance per cell (see GameMap.normalize), so positions coming from the map
+    can also be compared by identity. In-place arithmetic returns a new (mutable) Position instead of
+    changing this one.
+    """
+    __slots__ = ()
+
+    def __init__(self, x, y):
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "y", y)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("{} is immutable".format(self.__class__.__name__))
+
+    def __iadd__(self, other):
+        return self + other
+
+    def __isub__(self, other):
+        return self - other
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+    def __reduce__(self):
+        return self.__class__, (self.x, self.y)
@@ -0,0 +1,365 @@
+"""
+Compact binary game replays as seen by one bot, and a loader that seeks to any turn.
+
+A replay holds the pre-game input, every turn frame the bot read and every command line it sent, stored in a
+compressed .npz file:
+
+- constants, name: the constants JSON and the bot's name
+- seed: the seed the Game gave the random module, if it recorded one
+- init: the integers of the pre-game input after the constants line
+- frames, frame_offsets: each frame's integers, delta-encoded within the frame (first value kept as is),
+  concatenated; frame i spans frames[frame_offsets[i]:frame_offsets[i + 1]]
+- commands, command_offsets: each turn's commands as newline-separated UTF-8 bytes, concatenated the same way
+- halite_keyframes: the halite grid at the start of every KEYFRAME_INTERVAL-th recorded frame
+
+So reading a turn only decodes that turn's slice, and the map at any turn is rebuilt from the nearest keyframe
+with at most KEYFRAME_INTERVAL - 1 frames of changes. While a game is being recorded, checkpoints are kept as
+<path>.chunkNNNNN.npz files holding only the turns each one added; they are replaced by the replay file when the bot
+exits. Requires NumPy.
+"""
+import glob
+import json
+import os
+
+import numpy as np
+
+from . import common
+
+FORMAT_VERSION = 1
+KEYFRAME_INTERVAL = 25
+
+
+def frame_sections(frame, num_players):
+    """
+    :param frame: A frame's integers
+    :param num_players: The number of players in the game
+    :return: The offsets of each player's header in frame, and the offset of the changed-cell count
+    """
+    player_offsets = []
+    offset = 1
+    for _ in range(num_players):
+        player_offsets.append(offset)
+        offset += 4 + 4 * int(frame[offset + 1]) + 3 * int(frame[offset + 2])
+    return player_offsets, offset
+
+
+class ReplayRecorder:
+    """
+    Records what a Game reads and sends. Game(record_replay=path) sets one up.
+
+    Every checkpoint_every turns (see checkpoint) the turns recorded since the previous checkpoint are appended to
+    disk as a chunk file next to path, so a checkpoint only costs as much as the turns it adds and a bot killed by
+    the engine still leaves the game up to its last checkpoint behind (Replay reads the chunks when path is
+    missing). save(), which the Game runs at exit, writes the whole replay to path and removes the chunks.
+    """
+    def __init__(self, path, checkpoint_every=25):
+        """
+        :param path: The .npz file to write
+        :param checkpoint_every: Write a chunk every this many recorded turns (0 to only write at exit)
+        """
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self.name = ""
+        """The seed the bot's random module was given, if any, for replaying its random choices."""
+        self.seed = None
+        self._lines = []
+        self._constants = None
+        self._init = None
+        self._frames = []
+        self._commands = []
+        self._checkpointed = 0
+        self._num_chunks = 0
+
+    def start(self):
+        """Start capturing the lines read through common.read_input."""
+        common.log_input(self._lines)
+
+    def record_init(self):
+        """Keep the pre-game input read so far."""
+        self._constants = self._lines[0]
+        self._init = np.fromstring(" ".join(self._lines[1:]), dtype=np.int64, sep=" ")
+        self._lines.clear()
+
+    def record_frame(self, frame=None):
+        """
+        Keep a turn frame.
+        :param frame: The frame's integers, if already decoded; otherwise the lines read since the last frame
+        """
+        if frame is None:
+            frame = np.fromstring(" ".join(self._lines), dtype=np.int64, sep=" ")
+        self._lines.clear()
+        self._frames.append(frame)
+
+    def record_commands(self, commands):
+        """
+        Keep a turn's commands.
+        :param commands: The list of commands sent
+        """
+        self._commands.append("\n".join(commands))
+
+    def checkpoint(self):
+        """
+        Write the turns recorded since the last checkpoint as a new chunk, once there are checkpoint_every of them.
+        :return: nothing
+        """
+        end = len(self._commands)
+        if not self.checkpoint_every or self._init is None or end - self._checkpointed < self.checkpoint_every:
+            return
+        start = self._checkpointed
+        if self._num_chunks == 0:
+            # Whatever an earlier game left at this path would shadow the chunks
+            _remove(self.path, *chunk_paths(self.path))
+        arrays = _chunk_arrays(self._frames[start:end], self._commands[start:end])
+        if self._num_chunks == 0:
+            arrays.update(_header_arrays(self._constants, self.name, self._init, self.seed))
+        _write(np.savez, "{}.chunk{:05d}.npz".format(self.path, self._num_chunks), arrays)
+        self._num_chunks += 1
+        self._checkpointed = end
+
+    def save(self):
+        """
+        Write the whole replay to path and remove the checkpoint chunks.
+        :return: nothing
+        """
+        if self._init is None:
+            return
+        _write(np.savez_compressed, self.path,
+               _replay_arrays(self._constants, self.name, self._init, self.seed, self._frames, self._commands))
+        _remove(*chunk_paths(self.path))
+
+
+def chunk_paths(path):
+    """
+    :param path: A replay path
+    :return: The checkpoint chunk files recorded for path, in order
+    """
+    return sorted(glob.glob(glob.escape(path) + ".chunk*.npz"))
+
+
+def _write(save, path, arrays):
+    """
+    Write arrays with a NumPy savez function under a temporary name and rename the file over path, so an
+    interrupted write never leaves a truncated file at path.
+    """
+    partial = path + ".partial"
+    with open(partial, "wb") as replay_file:
+        save(replay_file, **arrays)
+    os.replace(partial, path)
+
+
+def _remove(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _chunk_arrays(frames, commands):
+    """
+    :return: The arrays of a checkpoint chunk holding frames (integer arrays) and commands (newline-joined strings)
+    """
+    encoded_commands = [line.encode() for line in commands]
+    return {
+        "frames": np.concatenate(frames).astype(np.int32),
+        "frame_lengths": np.array([len(frame) for frame in frames], dtype=np.int64),
+        "commands": np.frombuffer(b"".join(encoded_commands), dtype=np.uint8),
+        "command_lengths": np.array([len(line) for line in encoded_commands], dtype=np.int64),
+    }
+
+
+def _read_chunks(path):
+    """
+    :param path: A replay path whose replay was not written, only checkpointed
+    :return: The arrays of the replay file the chunks make up
+    """
+    header = None
+    frames = []
+    commands = []
+    for chunk_path in chunk_paths(path):
+        with np.load(chunk_path) as chunk:
+            if header is None:
+                if int(chunk["version"]) != FORMAT_VERSION:
+                    raise ValueError("unsupported replay version {}".format(int(chunk["version"])))
+                header = (str(chunk["constants"]), str(chunk["name"]), chunk["init"].astype(np.int64),
+                          int(chunk["seed"]) if "seed" in chunk.files else None)
+            frame_ends = np.cumsum(chunk["frame_lengths"])
+            frames += np.split(chunk["frames"].astype(np.int64), frame_ends[:-1])
+            data = chunk["commands"].tobytes()
+            command_ends = np.cumsum(chunk["command_lengths"]).tolist()
+            commands += [data[start:end].decode() for start, end in zip([0] + command_ends[:-1], command_ends)]
+    if header is None:
+        raise FileNotFoundError("no replay or checkpoint chunks at {}".format(path))
+    return _replay_arrays(*header, frames, commands)
+
+
+def _header_arrays(constants, name, init, seed):
+    """
+    :return: The arrays of a replay file describing the game rather than its turns
+    """
+    arrays = {
+        "version": np.array(FORMAT_VERSION),
+        "constants": np.array(constants),
+        "name": np.array(name),
+        "init": init.astype(np.int32),
+    }
+    if seed is not None:
+        arrays["seed"] = np.array(seed, dtype=np.int64)
+    return arrays
+
+
+def _replay_arrays(constants, name, init, seed, frames, commands):
+    """
+    :param constants: The constants JSON line
+    :param name: The bot's name
+    :param init: The integers of the pre-game input after the constants line
+    :param seed: The seed of the bot's random module, or None
+    :param frames: Each recorded frame's integers
+    :param commands: Each turn's commands, newline-joined
+    :return: The arrays of a replay file, see the module docstring
+    """
+    frame_offsets = np.cumsum([0] + [len(frame) for frame in frames], dtype=np.int64)
+    deltas = [np.diff(frame, prepend=0) for frame in frames]
+    encoded_commands = [line.encode() for line in commands]
+    command_offsets = np.cumsum([0] + [len(line) for line in encoded_commands], dtype=np.int64)
+
+    num_players = int(init[0])
+    width, height = init[2 + 3 * num_players:4 + 3 * num_players].tolist()
+    halite = init[4 + 3 * num_players:].reshape(height, width).copy()
+    keyframes = []
+    for index, frame in enumerate(frames):
+        if index % KEYFRAME_INTERVAL == 0:
+            keyframes.append(halite.copy())
+        _, cells_offset = frame_sections(frame, num_players)
+        cells = frame[cells_offset + 1:].reshape(-1, 3)
+        halite[cells[:, 1], cells[:, 0]] = cells[:, 2]
+
+    arrays = _header_arrays(constants, name, init, seed)
+    arrays.update({
+        "frames": (np.concatenate(deltas) if deltas else np.zeros(0)).astype(np.int32),
+        "frame_offsets": frame_offsets,
+        "commands": np.frombuffer(b"".join(encoded_commands), dtype=np.uint8),
+        "command_offsets": command_offsets,
+        "halite_keyframes": (np.stack(keyframes) if keyframes else np.zeros((0, height, width))).astype(np.int32),
+    })
+    return arrays
+
+
+class Replay:
+    """
+    A recorded game, loaded from a ReplayRecorder file, or from its checkpoint chunks if the bot never got to write
+    it. Turns are numbered from 1, like Game.turn_number.
+    """
+    def __init__(self, path):
+        """
+        :param path: The .npz replay file
+        """
+        if os.path.exists(path) or not chunk_paths(path):
+            with np.load(path) as archive:
+                data = {key: archive[key] for key in archive.files}
+        else:
+            data = _read_chunks(path)
+        if int(data["version"]) != FORMAT_VERSION:
+            raise ValueError("unsupported replay version {}".format(int(data["version"])))
+        self.constants = json.loads(str(data["constants"]))
+        self.name = str(data["name"])
+        """The seed the bot's random module was given while recording, or None."""
+        self.seed = int(data["seed"]) if "seed" in data else None
+        self._init = data["init"].astype(np.int64)
+        self._frames = data["frames"]
+        self._frame_offsets = data["frame_offsets"]
+        self._commands = data["commands"].tobytes()
+        self._command_offsets = data["command_offsets"]
+        self._keyframes = data["halite_keyframes"]
+
+        self.num_players, self.my_id = self._init[:2].tolist()
+        grid_start = 4 + 3 * self.num_players
+        self.shipyards = {player: (x, y) for player, x, y in self._init[2:grid_start - 2].reshape(-1, 3).tolist()}
+        self.width, self.height = self._init[grid_start - 2:grid_start].tolist()
+        self.initial_halite = self._init[grid_start:].reshape(self.height, self.width)
+
+    @property
+    def num_turns(self):
+        """
+        :return: The number of frames recorded
+        """
+        return len(self._frame_offsets) - 1
+
+    def init_lines(self):
+        """
+        :return: The pre-game input lines, as the engine sent them
+        """
+        lines = [json.dumps(self.constants), "{} {}".format(self.num_players, self.my_id)]
+        lines += ["{} {} {}".format(player, x, y) for player, (x, y) in sorted(self.shipyards.items())]
+        lines.append("{} {}".format(self.width, self.height))
+        lines += [" ".join(map(str, row)) for row in self.initial_halite.tolist()]
+        return lines
+
+    def frame(self, turn):
+        """
+        :param turn: The turn number
+        :return: The integers of that turn's frame
+        """
+        start, end = self._frame_offsets[turn - 1], self._frame_offsets[turn]
+        return np.cumsum(self._frames[start:end], dtype=np.int64)
+
+    def frame_lines(self, turn):
+        """
+        :param turn: The turn number
+        :return: That turn's frame as the engine sent it, as a list of lines
+        """
+        frame = self.frame(turn)
+        player_offsets, cells_offset = frame_sections(frame, self.num_players)
+        lines = [str(frame[0])]
+        for offset in player_offsets:
+            num_ships, num_dropoffs = int(frame[offset + 1]), int(frame[offset + 2])
+            lines.append(" ".join(map(str, frame[offset:offset + 4].tolist())))
+            ships_end = offset + 4 + 4 * num_ships
+            lines += [" ".join(map(str, row)) for row in frame[offset + 4:ships_end].reshape(-1, 4).tolist()]
+            lines += [" ".join(map(str, row))
+                      for row in frame[ships_end:ships_end + 3 * num_dropoffs].reshape(-1, 3).tolist()]
+        lines.append(str(frame[cells_offset]))
+        lines += [" ".join(map(str, row)) for row in frame[cells_offset + 1:].reshape(-1, 3).tolist()]
+        return lines
+
+    def commands(self, turn):
+        """
+        :param turn: The turn number
+        :return: The list of commands the bot sent that turn (empty if it sent none or was not recorded)
+        """
+        if turn > len(self._command_offsets) - 1:
+            return []
+        start, end = self._command_offsets[turn - 1], self._command_offsets[turn]
+        return self._commands[start:end].decode().split("\n") if end > start else []
+
+    def command_lines(self):
+        """
+        :return: Every recorded turn's command line, as sent to the engine, in order
+        """
+        return [self._commands[start:end].decode().replace("\n", " ")
+                for start, end in zip(self._command_offsets[:-1].tolist(), self._command_offsets[1:].tolist())]
+
+    def ships(self, turn):
+        """
+        :param turn: The turn number
+        :return: {player id: (n, 4) array of ship id, x, y, halite} at the start of that turn
+        """
+        frame = self.frame(turn)
+        player_offsets, _ = frame_sections(frame, self.num_players)
+        return {int(frame[offset]): frame[offset + 4:offset + 4 + 4 * int(frame[offset + 1])].reshape(-1, 4)
+                for offset in player_offsets}
+
+    def halite(self, turn):
+        """
+        :param turn: The turn number
+        :return: The (height, width) halite grid after that turn's frame was applied
+        """
+        index = turn - 1
+        keyframe = index // KEYFRAME_INTERVAL
+        halite = self._keyframes[keyframe].astype(np.int64)
+        for frame_index in range(keyframe * KEYFRAME_INTERVAL, index + 1):
+            frame = self.frame(frame_index + 1)
+            _, cells_offset = frame_sections(frame, self.num_players)
+            cells = frame[cells_offset + 1:].reshape(-1, 3)
+            halite[cells[:, 1], cells[:, 0]] = cells[:, 2]
+        return halite
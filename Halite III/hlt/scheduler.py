@@ -0,0 +1,86 @@
+"""
+Deadline-aware scheduling of a turn's work.
+"""
+import logging
+
+
+class TurnScheduler:
+    """
+    Runs a turn's work items in priority order until a share of the turn budget is used up, then falls back to
+    cheap default commands for everything that has not run, so the turn's output is always complete and on time.
+
+    Usage:
+        scheduler = TurnScheduler(game)
+        for ship in me.get_ships():
+            scheduler.add_ship(ship, lambda ship=ship: plan_move(ship))
+        game.end_turn(scheduler.run())
+    """
+    def __init__(self, game, budget_fraction=0.7):
+        """
+        :param game: The Game, whose timer measures the turn
+        :param budget_fraction: The share of the turn budget work items may use before falling back
+        """
+        self._game = game
+        self.budget_fraction = budget_fraction
+        self._items = []
+        """How many work items ran and how many fell back in the last run()."""
+        self.completed = 0
+        self.skipped = 0
+
+    def add(self, work, fallback=None, priority=0):
+        """
+        Register a work item. Items run in order of descending priority, then registration order.
+        :param work: A callable returning a command, a list of commands or None
+        :param fallback: A command or list of commands to use if work does not get to run or fails
+        :param priority: Higher priorities run first
+        :return: nothing
+        """
+        self._items.append((-priority, len(self._items), work, fallback))
+
+    def add_ship(self, ship, work, priority=0):
+        """
+        Register a ship's work item, falling back to keeping the ship still.
+        :param ship: The ship the work decides a command for
+        :param work: A callable returning the ship's command
+        :param priority: Higher priorities run first
+        :return: nothing
+        """
+        self.add(work, ship.stay_still(), priority)
+
+    def out_of_time(self):
+        """
+        :return: Whether the work budget for this turn is used up
+        """
+        timer = self._game.timer
+        return timer.elapsed() >= timer.budget * self.budget_fraction
+
+    def run(self):
+        """
+        Run the registered work items and clear them.
+        :return: The list of commands from every item, or from its fallback where it did not run
+        """
+        items = sorted(self._items)
+        self._items = []
+        self.completed = self.skipped = 0
+        commands = []
+        for _, _, work, fallback in items:
+            result = fallback
+            if not self.out_of_time():
+                try:
+                    result = work()
+                    self.completed += 1
+                except Exception:
+                    logging.exception("work item failed, using its fallback")
+                    result = fallback
+                    self.skipped += 1
+            else:
+                self.skipped += 1
+            if isinstance(result, str):
+                commands.append(result)
+            elif result:
+                commands.extend(result)
+
+        if self.skipped:
+            logging.info("turn {}: {} of {} work items fell back".format(
+                self._game.turn_number, self.skipped, self.completed + self.skipped))
+        return commands
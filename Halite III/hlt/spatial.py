@@ -0,0 +1,125 @@
+"""
+Toroidal spatial index over ships and structures.
+
+Entities are kept in a uniform grid of square buckets, each bucket_size cells across, so radius and
+k-nearest queries only look at the buckets a query can reach instead of scanning every ship. The index is
+built straight from the players' ship and dropoff columns, so building it costs no Ship allocations; entity
+objects are only fetched for the results.
+"""
+
+
+class SpatialIndex:
+    """
+    Ships and structures of every player, bucketed by position.
+    """
+    def __init__(self, game_map, players, bucket_size=8):
+        """
+        :param game_map: The game map
+        :param players: All players in the game
+        :param bucket_size: The side of a bucket, in cells
+        """
+        self._game_map = game_map
+        self._players = {player.id: player for player in players}
+        self.bucket_size = bucket_size
+        self._columns = -(-game_map.width // bucket_size)
+        self._rows = -(-game_map.height // bucket_size)
+        self._buckets = [[] for _ in range(self._columns * self._rows)]
+        for player in self._players.values():
+            for ship_id, x, y, cargo in zip(*player.ship_columns()):
+                self._add(x, y, player.id, ship_id, cargo, True)
+            self._add(player.shipyard.position.x, player.shipyard.position.y, player.id, player.shipyard.id, 0,
+                      False)
+            for dropoff_id, x, y in zip(*player.dropoff_columns()):
+                self._add(x, y, player.id, dropoff_id, 0, False)
+
+    def _add(self, x, y, owner, entity_id, cargo, is_ship):
+        x %= self._game_map.width
+        y %= self._game_map.height
+        bucket = (y // self.bucket_size) * self._columns + x // self.bucket_size
+        self._buckets[bucket].append((x, y, owner, entity_id, cargo, is_ship))
+
+    def _entity(self, entry):
+        _, _, owner, entity_id, _, is_ship = entry
+        player = self._players[owner]
+        if is_ship:
+            return player.get_ship(entity_id)
+        if entity_id == player.shipyard.id:
+            return player.shipyard
+        return player.get_dropoff(entity_id)
+
+    def _candidates(self, position, reach, owner, not_owner, min_cargo, ships, structures):
+        """
+        :return: (distance, entry) for every entry passing the filters in the buckets within reach cells
+            of position along each axis
+        """
+        game_map = self._game_map
+        size = self.bucket_size
+        if 2 * reach + 1 >= game_map.width:
+            columns = range(self._columns)
+        else:
+            columns = {(x % game_map.width) // size for x in range(position.x - reach, position.x + reach + 1)}
+        if 2 * reach + 1 >= game_map.height:
+            rows = range(self._rows)
+        else:
+            rows = {(y % game_map.height) // size for y in range(position.y - reach, position.y + reach + 1)}
+
+        x_distances, y_distances = game_map.axis_distances
+        px, py = position.x, position.y
+        found = []
+        for row in rows:
+            for column in columns:
+                for entry in self._buckets[row * self._columns + column]:
+                    x, y, entry_owner, _, cargo, is_ship = entry
+                    if (not ships if is_ship else not structures) or cargo < min_cargo:
+                        continue
+                    if (owner is not None and entry_owner != owner) or \
+                            (not_owner is not None and entry_owner == not_owner):
+                        continue
+                    found.append((x_distances[(x - px) % game_map.width] + y_distances[(y - py) % game_map.height],
+                                  entry))
+        return found
+
+    def within(self, position, radius, owner=None, not_owner=None, min_cargo=0, ships=True, structures=False):
+        """
+        Find the entities within a Manhattan radius of a position, accounting for wrap-around.
+        :param position: The position to search around
+        :param radius: The largest distance to include
+        :param owner: Only include entities of this player id
+        :param not_owner: Leave out entities of this player id (e.g. game.my_id)
+        :param min_cargo: Only include ships carrying at least this much halite
+        :param ships: Whether to include ships
+        :param structures: Whether to include shipyards and dropoffs
+        :return: A list of (distance, entity) pairs, closest first
+        """
+        found = [(distance, entry) for distance, entry in
+                 self._candidates(position, radius, owner, not_owner, min_cargo, ships, structures)
+                 if distance <= radius]
+        found.sort(key=lambda item: (item[0], item[1][2], item[1][3]))
+        return [(distance, self._entity(entry)) for distance, entry in found]
+
+    def nearest(self, position, k=1, owner=None, not_owner=None, min_cargo=0, ships=True, structures=False):
+        """
+        Find the k entities closest to a position, accounting for wrap-around. The search reach starts at one bucket
+        and doubles until k entities are known to be closest.
+        :param position: The position to search around
+        :param k: How many entities to return
+        :param owner: Only include entities of this player id
+        :param not_owner: Leave out entities of this player id (e.g. game.my_id)
+        :param min_cargo: Only include ships carrying at least this much halite
+        :param ships: Whether to include ships
+        :param structures: Whether to include shipyards and dropoffs
+        :return: A list of up to k (distance, entity) pairs, closest first
+        """
+        game_map = self._game_map
+        full_reach = max(game_map.width, game_map.height)
+        reach = self.bucket_size
+        while True:
+            found = self._candidates(position, reach, owner, not_owner, min_cargo, ships, structures)
+            # Everything within reach of position along both axes was scanned, so any entity at distance <= reach
+            # is among the candidates
+            close = [item for item in found if item[0] <= reach]
+            if len(close) >= k or reach >= full_reach:
+                break
+            reach *= 2
+        found.sort(key=lambda item: (item[0], item[1][2], item[1][3]))
+        return [(distance, self._entity(entry)) for distance, entry in found[:k]]
@@ -0,0 +1,108 @@
+"""
+Per-turn timing of the bot's share of the engine's turn budget.
+"""
+import collections
+import logging
+import time
+
+
+class TurnTimer:
+    """
+    Times each turn in phases and keeps rolling statistics over recent turns.
+
+    The turn starts when its frame starts arriving. The phases are:
+    parse (frame arrival to the end of Game.update_frame), strategy (from there to Game.end_turn),
+    send (writing and flushing the commands) and total.
+    """
+    PHASES = ("parse", "strategy", "send", "total")
+
+    def __init__(self, budget=2.0, window=100, summary_every=50, warn_fraction=0.8):
+        """
+        :param budget: The engine's time limit per turn, in seconds
+        :param window: How many recent turns the rolling statistics cover
+        :param summary_every: Log a summary every this many turns (0 to never log)
+        :param warn_fraction: Log a warning for any turn that uses more than this fraction of the budget
+        """
+        self.budget = budget
+        self.summary_every = summary_every
+        self.warn_fraction = warn_fraction
+        self.turns = 0
+        self._samples = {phase: collections.deque(maxlen=window) for phase in self.PHASES}
+        self._received = None
+        self._parsed = None
+        self._ready = None
+
+    def frame_received(self, at=None):
+        """
+        Mark the start of a turn.
+        :param at: The perf_counter time the frame started arriving, if earlier than now
+        """
+        self._received = time.perf_counter() if at is None else at
+        self._parsed = self._ready = None
+
+    def frame_parsed(self):
+        """Mark the end of frame parsing."""
+        self._parsed = time.perf_counter()
+
+    def commands_ready(self):
+        """Mark the end of the strategy, when the commands are handed over to be sent."""
+        self._ready = time.perf_counter()
+
+    def commands_sent(self, turn_number):
+        """
+        Mark the end of the turn and record its phases.
+        :param turn_number: The turn that just ended, for logging
+        """
+        if self._received is None or self._parsed is None or self._ready is None:
+            return
+        sent = time.perf_counter()
+        durations = {
+            "parse": self._parsed - self._received,
+            "strategy": self._ready - self._parsed,
+            "send": sent - self._ready,
+            "total": sent - self._received,
+        }
+        for phase, duration in durations.items():
+            self._samples[phase].append(duration)
+        self.turns += 1
+        self._received = None
+
+        if durations["total"] > self.budget * self.warn_fraction:
+            logging.warning("turn {} used {:.0f}ms of the {:.0f}ms budget".format(
+                turn_number, durations["total"] * 1000, self.budget * 1000))
+        if self.summary_every and self.turns % self.summary_every == 0:
+            logging.info("turn {} timing {}".format(turn_number, self.summary()))
+
+    def elapsed(self):
+        """
+        :return: Seconds since the current turn's frame started arriving (0 between turns)
+        """
+        return 0.0 if self._received is None else time.perf_counter() - self._received
+
+    def time_remaining(self):
+        """
+        :return: Seconds left of the current turn's budget
+        """
+        return self.budget - self.elapsed()
+
+    def stats(self, phase):
+        """
+        :param phase: One of PHASES
+        :return: (p50, p95, max) of the phase over recent turns, in seconds, or None before the first turn
+        """
+        samples = sorted(self._samples[phase])
+        if not samples:
+            return None
+        return (samples[(len(samples) - 1) // 2], samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+                samples[-1])
+
+    def summary(self):
+        """
+        :return: A one-line p50/p95/max summary of every phase, in milliseconds
+        """
+        parts = []
+        for phase in self.PHASES:
+            stats = self.stats(phase)
+            if stats is not None:
+                parts.append("{} {:.1f}/{:.1f}/{:.1f}".format(phase, *(value * 1000 for value in stats)))
+        return "p50/p95/max ms: " + ", ".join(parts)
@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""
+A local, pure-Python stand-in for the Halite III engine binary.
+
+Generates a symmetric map, runs bot scripts as subprocesses and talks to them over stdin/stdout with the same
+protocol hlt.networking.Game reads, and applies the game rules: spawning, dropoff construction, move costs,
+collisions, deposits, mining with EXTRACT_RATIO and inspiration. Bots run unchanged, so it can be used for
+offline throughput and regression runs when the official binary is not available.
+
+    python tools/local_engine.py --width 32 --height 32 --seed 42 --results-as-json \
+        "python3 MrKotee_v2.py" "python3 MrKotee_v1.2.py"
+
+It is a stand-in, not a replica: map generation is simpler than the official generator, and a bot that sends
+an invalid command, crashes or runs out of time is dropped from the game (its entities stay frozen on the map).
+"""
+import argparse
+import json
+import os
+import selectors
+import shlex
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from hlt import commands  # noqa: E402
+from hlt.fields import diamond_kernel, toroidal_convolve  # noqa: E402
+
+DEFAULT_CONSTANTS = {
+    "CAPTURE_ENABLED": False,
+    "CAPTURE_RADIUS": 3,
+    "DEFAULT_MAP_HEIGHT": 32,
+    "DEFAULT_MAP_WIDTH": 32,
+    "DROPOFF_COST": 4000,
+    "DROPOFF_PENALTY_RATIO": 4,
+    "EXTRACT_RATIO": 4,
+    "FACTOR_EXP_1": 2.0,
+    "FACTOR_EXP_2": 2.0,
+    "INITIAL_ENERGY": 5000,
+    "INSPIRATION_ENABLED": True,
+    "INSPIRATION_RADIUS": 4,
+    "INSPIRATION_SHIP_COUNT": 2,
+    "INSPIRED_BONUS_MULTIPLIER": 2.0,
+    "INSPIRED_EXTRACT_RATIO": 4,
+    "INSPIRED_MOVE_COST_RATIO": 10,
+    "MAX_CELL_PRODUCTION": 1000,
+    "MAX_ENERGY": 1000,
+    "MAX_PLAYERS": 16,
+    "MAX_TURNS": 400,
+    "MAX_TURN_THRESHOLD": 64,
+    "MIN_CELL_PRODUCTION": 900,
+    "MIN_TURNS": 400,
+    "MIN_TURN_THRESHOLD": 32,
+    "MOVE_COST_RATIO": 10,
+    "NEW_ENTITY_ENERGY_COST": 1000,
+    "PERSISTENCE": 0.7,
+    "SHIPS_ABOVE_FOR_CAPTURE": 3,
+    "STRICT_ERRORS": False,
+    "game_seed": 0,
+}
+
+DIRECTIONS = {
+    commands.NORTH: (0, -1),
+    commands.SOUTH: (0, 1),
+    commands.EAST: (1, 0),
+    commands.WEST: (-1, 0),
+    commands.STAY_STILL: (0, 0),
+}
+
+
+class BotError(Exception):
+    """A bot broke the protocol: it crashed, timed out or sent an invalid command."""
+
+
+def max_turns_for(width, height):
+    """
+    :return: The game length the official engine uses for a map of this size
+    """
+    size = max(width, height)
+    return 400 + (min(max(size, 32), 64) - 32) * 25 // 8
+
+
+def generate_map(width, height, num_players, rng):
+    """
+    Generate a halite map mirrored so every player starts from an equivalent position.
+    :param rng: A numpy Generator
+    :return: The (height, width) int64 halite array and the list of (x, y) shipyard positions
+    """
+    tile_height = height // 2 if num_players == 4 else height
+    tile_width = width // 2
+
+    noise = np.zeros((tile_height, tile_width))
+    for octave, scale in enumerate((16, 8, 4, 2)):
+        coarse = rng.random((tile_height // scale + 2, tile_width // scale + 2))
+        ys = np.arange(tile_height) / scale
+        xs = np.arange(tile_width) / scale
+        y0, x0 = ys.astype(int), xs.astype(int)
+        fy, fx = (ys - y0)[:, None], (xs - x0)[None, :]
+        smooth = (coarse[np.ix_(y0, x0)] * (1 - fy) * (1 - fx) + coarse[np.ix_(y0 + 1, x0)] * fy * (1 - fx) +
+                  coarse[np.ix_(y0, x0 + 1)] * (1 - fy) * fx + coarse[np.ix_(y0 + 1, x0 + 1)] * fy * fx)
+        noise += smooth * 0.6 ** octave
+    noise = (noise - noise.min()) / (noise.max() - noise.min() + 1e-9)
+    tile = np.clip(noise ** 3 * 1000 + rng.integers(0, 40, noise.shape), 0, 1000).astype(np.int64)
+
+    tile = np.hstack([tile, tile[:, ::-1]])
+    if num_players == 4:
+        tile = np.vstack([tile, tile[::-1, :]])
+    halite = np.zeros((height, width), dtype=np.int64)
+    halite[:tile.shape[0], :tile.shape[1]] = tile
+
+    left, right = width // 4, width - 1 - width // 4
+    if num_players == 2:
+        shipyards = [(left, height // 2), (right, height // 2)]
+    else:
+        top, bottom = height // 4, height - 1 - height // 4
+        shipyards = [(left, top), (right, top), (left, bottom), (right, bottom)]
+    for x, y in shipyards:
+        halite[y, x] = 0
+    return halite, shipyards
+
+
+class Ship:
+    """A ship as the engine tracks it."""
+    def __init__(self, owner, id, x, y):
+        self.owner = owner
+        self.id = id
+        self.x = x
+        self.y = y
+        self.halite = 0
+
+
+class EngineState:
+    """
+    The game state and rules, independent of how bots are run. turn_number counts the turns played so far.
+    """
+    def __init__(self, num_players, width, height, seed, constants=None):
+        if num_players not in (2, 4):
+            raise ValueError("the local engine supports 2 or 4 players, not {}".format(num_players))
+        self.constants = dict(DEFAULT_CONSTANTS, MAX_TURNS=max_turns_for(width, height), game_seed=seed)
+        self.constants.update(constants or {})
+        self.num_players = num_players
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.halite, self.shipyards = generate_map(width, height, num_players, np.random.default_rng(seed))
+        self.turn_number = 0
+        self.banks = [self.constants["INITIAL_ENERGY"]] * num_players
+        self.ships = {}
+        self.dropoffs = {}
+        self.structures = {(x, y): player for player, (x, y) in enumerate(self.shipyards)}
+        self.active = [True] * num_players
+        self._next_ship_id = 0
+        self._next_dropoff_id = 0
+        self._changed_cells = set()
+
+    def init_lines(self, player_id):
+        """
+        :return: The pre-game lines sent to one player
+        """
+        lines = [json.dumps(self.constants), "{} {}".format(self.num_players, player_id)]
+        lines += ["{} {} {}".format(player, x, y) for player, (x, y) in enumerate(self.shipyards)]
+        lines.append("{} {}".format(self.width, self.height))
+        lines += [" ".join(map(str, row)) for row in self.halite.tolist()]
+        return lines
+
+    def frame_lines(self):
+        """
+        :return: The lines of the next turn's frame, the same for every player
+        """
+        lines = [str(self.turn_number + 1)]
+        for player in range(self.num_players):
+            ships = [ship for ship in self.ships.values() if ship.owner == player]
+            dropoffs = [(id, x, y) for id, (owner, x, y) in self.dropoffs.items() if owner == player]
+            lines.append("{} {} {} {}".format(player, len(ships), len(dropoffs), self.banks[player]))
+            lines += ["{} {} {} {}".format(ship.id, ship.x, ship.y, ship.halite) for ship in ships]
+            lines += ["{} {} {}".format(*dropoff) for dropoff in dropoffs]
+        lines.append(str(len(self._changed_cells)))
+        lines += ["{} {} {}".format(x, y, self.halite[y, x]) for x, y in sorted(self._changed_cells)]
+        return lines
+
+    @property
+    def finished(self):
+        return self.turn_number >= self.constants["MAX_TURNS"] or not any(self.active)
+
+    def parse_commands(self, player, line):
+        """
+        :return: The set of spawning players, dropoff-building ship ids and {ship id: (dx, dy)} moves in line
+        :raises BotError: if line holds an invalid command
+        """
+        spawn = False
+        constructs = set()
+        moves = {}
+        tokens = line.split()
+        index = 0
+        while index < len(tokens):
+            command = tokens[index]
+            try:
+                if command == commands.GENERATE:
+                    spawn = True
+                    index += 1
+                    continue
+                ship_id = int(tokens[index + 1])
+                if command == commands.CONSTRUCT:
+                    constructs.add(ship_id)
+                    index += 2
+                elif command == commands.MOVE:
+                    moves[ship_id] = DIRECTIONS[tokens[index + 2]]
+                    index += 3
+                else:
+                    raise BotError("unknown command {!r}".format(command))
+            except (IndexError, KeyError, ValueError):
+                raise BotError("malformed command in {!r}".format(line))
+            ship = self.ships.get(ship_id)
+            if ship is None or ship.owner != player:
+                raise BotError("player {} does not own ship {}".format(player, ship_id))
+        return spawn, constructs, moves
+
+    def _inspired(self):
+        """
+        :return: The set of ids of ships with enough opponent ships around them to be inspired
+        """
+        if not self.constants["INSPIRATION_ENABLED"] or not self.ships:
+            return set()
+        occupancy = np.zeros((self.num_players, self.height, self.width), dtype=np.int64)
+        for ship in self.ships.values():
+            occupancy[ship.owner, ship.y, ship.x] += 1
+        kernel = diamond_kernel(self.width, self.height, self.constants["INSPIRATION_RADIUS"])
+        nearby = np.stack([toroidal_convolve(grid, kernel) for grid in occupancy])
+        total = nearby.sum(axis=0)
+        needed = self.constants["INSPIRATION_SHIP_COUNT"]
+        return {ship.id for ship in self.ships.values()
+                if total[ship.y, ship.x] - nearby[ship.owner, ship.y, ship.x] >= needed}
+
+    def step(self, player_commands):
+        """
+        Apply one turn.
+        :param player_commands: {player id: (spawn, constructs, moves)} for the active players
+        :return: nothing
+        """
+        constants = self.constants
+        self._changed_cells = set()
+        inspired = self._inspired()
+
+        # Dropoff construction
+        for player, (_, constructs, _) in player_commands.items():
+            for ship_id in constructs:
+                ship = self.ships[ship_id]
+                cell = (ship.x, ship.y)
+                cost = constants["DROPOFF_COST"] - ship.halite - int(self.halite[ship.y, ship.x])
+                if cell in self.structures or self.banks[player] < cost:
+                    continue
+                self.banks[player] -= cost
+                self.dropoffs[self._next_dropoff_id] = (player, ship.x, ship.y)
+                self._next_dropoff_id += 1
+                self.structures[cell] = player
+                if self.halite[ship.y, ship.x]:
+                    self.halite[ship.y, ship.x] = 0
+                    self._changed_cells.add(cell)
+                del self.ships[ship_id]
+
+        # Movement
+        stayed = set()
+        for ship in self.ships.values():
+            moves = player_commands[ship.owner][2] if ship.owner in player_commands else {}
+            dx, dy = moves.get(ship.id, (0, 0))
+            if (dx, dy) == (0, 0):
+                stayed.add(ship.id)
+                continue
+            ratio = constants["INSPIRED_MOVE_COST_RATIO" if ship.id in inspired else "MOVE_COST_RATIO"]
+            cost = int(self.halite[ship.y, ship.x]) // ratio
+            if ship.halite < cost:
+                stayed.add(ship.id)
+                continue
+            ship.halite -= cost
+            ship.x = (ship.x + dx) % self.width
+            ship.y = (ship.y + dy) % self.height
+
+        # Spawning
+        for player, (spawn, _, _) in player_commands.items():
+            if spawn and self.banks[player] >= constants["NEW_ENTITY_ENERGY_COST"]:
+                self.banks[player] -= constants["NEW_ENTITY_ENERGY_COST"]
+                x, y = self.shipyards[player]
+                self.ships[self._next_ship_id] = Ship(player, self._next_ship_id, x, y)
+                self._next_ship_id += 1
+
+        # Collisions
+        by_cell = {}
+        for ship in self.ships.values():
+            by_cell.setdefault((ship.x, ship.y), []).append(ship)
+        for (x, y), ships in by_cell.items():
+            if len(ships) < 2:
+                continue
+            cargo = sum(ship.halite for ship in ships)
+            owner = self.structures.get((x, y))
+            if owner is not None:
+                self.banks[owner] += cargo
+            elif cargo:
+                self.halite[y, x] += cargo
+                self._changed_cells.add((x, y))
+            for ship in ships:
+                del self.ships[ship.id]
+
+        # Deposits and mining; a dropped player's ships stay frozen
+        for ship in self.ships.values():
+            if not self.active[ship.owner]:
+                continue
+            cell = (ship.x, ship.y)
+            owner = self.structures.get(cell)
+            if owner is not None:
+                if owner == ship.owner:
+                    self.banks[owner] += ship.halite
+                    ship.halite = 0
+                continue
+            if ship.id not in stayed:
+                continue
+            is_inspired = ship.id in inspired
+            ratio = constants["INSPIRED_EXTRACT_RATIO" if is_inspired else "EXTRACT_RATIO"]
+            space = constants["MAX_ENERGY"] - ship.halite
+            extracted = min(-(-int(self.halite[ship.y, ship.x]) // ratio), space)
+            if extracted <= 0:
+                continue
+            self.halite[ship.y, ship.x] -= extracted
+            self._changed_cells.add(cell)
+            ship.halite += extracted
+            if is_inspired:
+                ship.halite += min(int(extracted * constants["INSPIRED_BONUS_MULTIPLIER"]),
+                                   constants["MAX_ENERGY"] - ship.halite)
+
+        self.turn_number += 1
+
+    def results(self):
+        """
+        :return: {player id: {"rank": rank, "score": halite}}, ranked by final halite
+        """
+        order = sorted(range(self.num_players), key=lambda player: (-self.banks[player], player))
+        return {str(player): {"rank": rank + 1, "score": self.banks[player]} for rank, player in enumerate(order)}
+
+
+class BotProcess:
+    """
+    A bot run as a subprocess, spoken to line by line over pipes.
+    """
+    def __init__(self, command, cwd, env=None):
+        self.command = command
+        self._process = subprocess.Popen(command, shell=True, cwd=cwd, env=env, stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._process.stdout, selectors.EVENT_READ)
+        self._buffer = b""
+
+    def send(self, lines):
+        try:
+            self._process.stdin.write(("\n".join(lines) + "\n").encode())
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            raise BotError("bot exited")
+
+    def read_line(self, timeout):
+        """
+        :param timeout: Seconds to wait for the line, or None to wait forever
+        :return: The next line the bot sent, without its newline
+        :raises BotError: if the bot exits or times out first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while b"\n" not in self._buffer:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0 or not self._selector.select(remaining):
+                raise BotError("bot timed out")
+            chunk = os.read(self._process.stdout.fileno(), 1 << 16)
+            if not chunk:
+                raise BotError("bot exited")
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return line.decode().strip()
+
+    def close(self):
+        self._selector.close()
+        for stream in (self._process.stdin, self._process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        try:
+            self._process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+
+
+def resolve_paths(command):
+    """
+    Make the relative paths in a shell command absolute, so it still works when run from another directory.
+    :param command: A shell command, e.g. "python3 MrKotee_v2.py"
+    :return: The command with every argument naming an existing relative path replaced by its absolute path
+    """
+    return " ".join(shlex.quote(os.path.abspath(token) if not os.path.isabs(token) and os.path.exists(token)
+                                else token)
+                    for token in shlex.split(command))
+
+
+def run_game(bot_commands, width=32, height=None, seed=None, constants=None, init_timeout=30.0,
+             turn_timeout=2.0, bot_cwd=None, replay_dir=None):
+    """
+    Play one game between bot commands.
+    :param bot_commands: Shell commands starting each bot, e.g. "python3 MrKotee_v2.py"
+    :param width: The map width
+    :param height: The map height (defaults to width)
+    :param seed: The map seed (random if None)
+    :param constants: Overrides for the game constants, e.g. {"MAX_TURNS": 100}
+    :param init_timeout: Seconds a bot gets to send its name, or None for no limit
+    :param turn_timeout: Seconds a bot gets per turn, or None for no limit
+    :param bot_cwd: Directory bots run in and write their logs to, created if missing; the current directory if
+        None. Relative paths in bot_commands are resolved against the current directory, not against it.
+    :param replay_dir: If set, every hlt bot records its own replay of the game to
+        replay_dir/seed-<seed>-player-<id>.npz (through the HLT_RECORD_REPLAY environment variable)
+    :return: A results dict shaped like the official engine's --results-as-json output
+    """
+    if seed is None:
+        seed = int.from_bytes(os.urandom(4), "little")
+    state = EngineState(len(bot_commands), width, height or width, seed, constants)
+    bots = []
+    terminated = {}
+    start = time.monotonic()
+    env = None
+    if bot_cwd is not None:
+        os.makedirs(bot_cwd, exist_ok=True)
+        bot_commands = [resolve_paths(command) for command in bot_commands]
+    if replay_dir is not None:
+        os.makedirs(replay_dir, exist_ok=True)
+        env = dict(os.environ, HLT_RECORD_REPLAY=os.path.join(
+            os.path.abspath(replay_dir), "seed-{}-player-{{player}}.npz".format(seed)))
+
+    def drop(player, error):
+        state.active[player] = False
+        terminated[str(player)] = str(error)
+
+    try:
+        for player, command in enumerate(bot_commands):
+            bot = BotProcess(command, bot_cwd, env)
+            bots.append(bot)
+            try:
+                bot.send(state.init_lines(player))
+            except BotError as error:
+                drop(player, error)
+        for player, bot in enumerate(bots):
+            if state.active[player]:
+                try:
+                    bot.read_line(init_timeout)
+                except BotError as error:
+                    drop(player, error)
+
+        while not state.finished:
+            frame = state.frame_lines()
+            player_commands = {}
+            for player, bot in enumerate(bots):
+                if state.active[player]:
+                    try:
+                        bot.send(frame)
+                    except BotError as error:
+                        drop(player, error)
+            for player, bot in enumerate(bots):
+                if state.active[player]:
+                    try:
+                        player_commands[player] = state.parse_commands(player, bot.read_line(turn_timeout))
+                    except BotError as error:
+                        drop(player, error)
+            state.step(player_commands)
+    finally:
+        for bot in bots:
+            bot.close()
+
+    return {
+        "execution_time": time.monotonic() - start,
+        "map_generator": "local",
+        "map_height": state.height,
+        "map_seed": seed,
+        "map_width": state.width,
+        "stats": state.results(),
+        "terminated": terminated,
+        "turns": state.turn_number,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local Halite III game between bot commands.")
+    parser.add_argument("bots", nargs="+", help="shell commands starting each bot (2 or 4)")
+    parser.add_argument("--width", type=int, default=32)
+    parser.add_argument("--height", type=int, default=None)
+    parser.add_argument("-s", "--seed", type=int, default=None)
+    parser.add_argument("--turn-limit", type=int, default=None, help="override MAX_TURNS")
+    parser.add_argument("--turn-timeout", type=float, default=2.0, help="seconds per turn; 0 for no limit")
+    parser.add_argument("--log-dir", default=None,
+                        help="directory bots run in and write logs to (created if missing)")
+    parser.add_argument("--replay-dir", default=None,
+                        help="directory each hlt bot records its replay to (see hlt.replay)")
+    parser.add_argument("--results-as-json", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = run_game(args.bots, width=args.width, height=args.height, seed=args.seed,
+                       constants={"MAX_TURNS": args.turn_limit} if args.turn_limit else None,
+                       turn_timeout=args.turn_timeout or None, bot_cwd=args.log_dir,
+                       replay_dir=args.replay_dir)
+    if args.results_as_json:
+        print(json.dumps(results))
+    else:
+        for player, stats in sorted(results["stats"].items(), key=lambda item: item[1]["rank"]):
+            print("#{} player {} ({}): {} halite{}".format(
+                stats["rank"], player, args.bots[int(player)], stats["score"],
+                " [terminated: {}]".format(results["terminated"][player]) if player in results["terminated"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Deterministic replay-driven regression runs for bot scripts.
+
+Feeds the engine input captured in a replay (see hlt.replay) to a bot script without an engine, by replacing
+hlt's read_input/read_input_bytes and networking.send_commands, with the random module seeded with the seed
+Game recorded in the replay. The bot's commands are then diffed turn by turn against the replay's recorded
+commands or against another bot run on the same input.
+
+Any bot can be recorded without editing it: set HLT_RECORD_REPLAY to the .npz path ("{player}" is replaced
+with the bot's player id), or let the local engine record every bot with --replay-dir:
+
+    python tools/local_engine.py -s 42 --replay-dir replays "python MrKotee_v1.2.py" "python MrKotee_v2.py"
+
+    python tools/replay_regression.py replays/seed-42-player-0.npz MrKotee_v1.2.py
+    python tools/replay_regression.py game.npz MrKotee_v2.py --against MrKotee_v1.2.py --turns 100
+    python tools/replay_regression.py game.npz MrKotee_v2.py --profile-turn 250
+
+Frames are replayed as recorded, so once the bot's commands diverge, later turns show how it reacts to the
+recorded game rather than to the game its own moves would have produced.
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import cProfile
+import importlib
+import io
+import logging
+import multiprocessing
+import os
+import pstats
+import random
+import runpy
+import sys
+import tempfile
+
+INPUT_MODULES = ("common", "entity", "game_map", "player", "networking")
+
+
+class _Feeder:
+    """
+    Serves captured engine input to hlt one line, or one frame of bytes, at a time.
+    """
+    def __init__(self, init_lines, frames, on_frame=None):
+        self._lines = list(init_lines)
+        self._frame_starts = {}
+        for turn, frame in enumerate(frames, 1):
+            self._frame_starts[len(self._lines)] = turn
+            self._lines.extend(frame)
+        self._frame_ends = sorted(self._frame_starts)[1:] + [len(self._lines)]
+        self._position = 0
+        self._on_frame = on_frame
+
+    def _advance(self, count):
+        turn = self._frame_starts.get(self._position)
+        if turn is not None and self._on_frame is not None:
+            self._on_frame(turn)
+        lines = self._lines[self._position:self._position + count]
+        self._position += count
+        return lines
+
+    def read_input(self):
+        if self._position >= len(self._lines):
+            logging.shutdown()
+            raise SystemExit("end of replay")
+        return self._advance(1)[0]
+
+    def read_input_bytes(self, size):
+        if self._position >= len(self._lines):
+            logging.shutdown()
+            raise SystemExit("end of replay")
+        end = next(end for end in self._frame_ends if end > self._position)
+        return ("\n".join(self._advance(end - self._position)) + "\n").encode()
+
+
+def run_bot(script, replay_path, seed=None, max_turns=None, profile_turn=None):
+    """
+    Run a bot script in this process against a replay's input.
+    :param script: The bot script path
+    :param replay_path: The .npz replay to read input from
+    :param seed: The seed for the random module (the replay's recorded seed if None, or 0 if it has none)
+    :param max_turns: Stop after this many turns (all recorded turns if None)
+    :param profile_turn: Profile this turn's strategy with cProfile and include the stats in the result
+    :return: A dict with the bot's name, its list of commands per turn, any error and the profile text
+    """
+    script = os.path.abspath(script)
+    sys.path.insert(0, os.path.dirname(script))
+    import hlt
+    from hlt.replay import Replay
+
+    replay = Replay(os.path.abspath(replay_path))
+    turns = replay.num_turns if max_turns is None else min(max_turns, replay.num_turns)
+    if seed is None:
+        seed = replay.seed if replay.seed is not None else 0
+    sent = []
+    profiler = cProfile.Profile()
+    result = {"script": script, "name": None, "turns": [], "error": None, "profile": None}
+
+    def on_frame(turn):
+        if turn == profile_turn:
+            profiler.enable()
+
+    def send_commands(commands):
+        # Join like the real send_commands, so a bot sending a non-string command fails here as it would live
+        commands = list(commands)
+        " ".join(commands)
+        sent.append(commands)
+        if profile_turn is not None and len(sent) - 1 == profile_turn:
+            profiler.disable()
+
+    feeder = _Feeder(replay.init_lines(), [replay.frame_lines(turn) for turn in range(1, turns + 1)], on_frame)
+    for name in INPUT_MODULES:
+        module = importlib.import_module("hlt." + name)
+        if hasattr(module, "read_input"):
+            module.read_input = feeder.read_input
+        if hasattr(module, "read_input_bytes"):
+            module.read_input_bytes = feeder.read_input_bytes
+    hlt.networking.send_commands = send_commands
+
+    # The replayed bot must not record over the replay it is reading
+    os.environ.pop(hlt.networking.RECORD_REPLAY_ENV, None)
+    os.chdir(tempfile.mkdtemp(prefix="halite-regression-"))
+    random.seed(seed)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            runpy.run_path(script, run_name="__main__")
+    except SystemExit:
+        pass
+    except Exception as error:
+        result["error"] = "{}: {}".format(type(error).__name__, error)
+
+    if sent:
+        result["name"] = " ".join(sent[0])
+        result["turns"] = sent[1:]
+    if profile_turn is not None and len(sent) > profile_turn:
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(25)
+        result["profile"] = stream.getvalue()
+    return result
+
+
+def run_isolated(*args, **kwargs):
+    """
+    run_bot in a fresh interpreter, so bots do not share module state.
+    """
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_bot, *args, **kwargs).result()
+
+
+def diff_commands(expected, actual):
+    """
+    Compare two runs' commands turn by turn, ignoring command order within a turn.
+    :param expected: Each turn's list of command strings
+    :param actual: Each turn's list of command strings
+    :return: A list of (turn, only in expected, only in actual) for every turn that differs
+    """
+    differences = []
+    for turn in range(1, max(len(expected), len(actual)) + 1):
+        before = set(expected[turn - 1]) if turn <= len(expected) else set()
+        after = set(actual[turn - 1]) if turn <= len(actual) else set()
+        if before != after:
+            differences.append((turn, sorted(before - after), sorted(after - before)))
+    return differences
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-run a bot against a recorded game and diff its commands.")
+    parser.add_argument("replay", help="a .npz replay (HLT_RECORD_REPLAY or local_engine.py --replay-dir)")
+    parser.add_argument("script", help="the bot script to run")
+    parser.add_argument("--against", default=None,
+                        help="another bot script to compare with (default: the commands recorded in the replay)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed for the random module (default: the seed recorded in the replay)")
+    parser.add_argument("--turns", type=int, default=None, help="only replay this many turns")
+    parser.add_argument("--profile-turn", type=int, default=None, help="profile the script on this turn")
+    parser.add_argument("--show", type=int, default=10, help="how many differing turns to print")
+    args = parser.parse_args(argv)
+
+    candidate = run_isolated(args.script, args.replay, args.seed, args.turns, args.profile_turn)
+    if args.against:
+        reference = run_isolated(args.against, args.replay, args.seed, args.turns)
+        expected = reference["turns"]
+        label = args.against
+    else:
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+        from hlt.replay import Replay
+        replay = Replay(args.replay)
+        turns = replay.num_turns if args.turns is None else min(args.turns, replay.num_turns)
+        expected = [replay.commands(turn) for turn in range(1, turns + 1)]
+        label = "recorded commands"
+
+    if candidate["error"]:
+        print("{} failed: {}".format(args.script, candidate["error"]))
+    if candidate["profile"]:
+        print(candidate["profile"])
+
+    differences = diff_commands(expected, candidate["turns"])
+    print("{} vs {}: {} turns compared, {} differ".format(
+        args.script, label, max(len(expected), len(candidate["turns"])), len(differences)))
+    for turn, missing, extra in differences[:args.show]:
+        print("turn {}: -{} +{}".format(turn, missing, extra))
+    sys.exit(1 if differences or candidate["error"] else 0)
+
+
+if __name__ == "__main__":
+    main()
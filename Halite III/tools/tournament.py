@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Parallel tournament runner for comparing bots over many games.
+
+Each game runs an engine command (the official binary or tools/local_engine.py, anything that takes
+--width/--height/-s/--results-as-json and bot commands) in its own working directory, with the bots as
+subprocesses. Games are spread over a process pool, map seeds and seatings are derived from one base seed so a
+tournament can be repeated exactly, and every finished game is appended as a JSON line to the results file.
+
+    python tools/tournament.py --games 200 --workers 8 --results results.jsonl \
+        MrKotee_v0.py MrKotee_v1.py MrKotee_v1.2.py MrKotee_v2.py
+
+    python tools/tournament.py --games 40 --scaling MrKotee_v1.2.py MrKotee_v2.py
+"""
+import argparse
+import collections
+import concurrent.futures
+import json
+import os
+import random
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+LOCAL_ENGINE = "{} {}".format(shlex.quote(sys.executable),
+                              shlex.quote(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                       "local_engine.py")))
+
+
+def schedule(bots, games, num_players, sizes, seed):
+    """
+    Build the match list. Seats and sizes are drawn from a generator seeded with seed, so the same arguments
+    always give the same tournament.
+    :return: A list of match dicts with game, seed, width, height and bots
+    """
+    rng = random.Random(seed)
+    matches = []
+    for game in range(games):
+        seats = rng.sample(bots, num_players) if len(bots) >= num_players else rng.choices(bots, k=num_players)
+        size = rng.choice(sizes)
+        matches.append({"game": game, "seed": rng.randrange(2 ** 31), "width": size, "height": size,
+                        "bots": seats})
+    return matches
+
+
+def play(match, engine, timeout):
+    """
+    Run one match through the engine command in a fresh working directory.
+    :return: The match dict extended with the engine's stats, terminated players, elapsed time and any error
+    """
+    workdir = tempfile.mkdtemp(prefix="halite-tournament-")
+    bot_commands = ["{} {}".format(shlex.quote(sys.executable), shlex.quote(os.path.abspath(bot)))
+                    for bot in match["bots"]]
+    command = shlex.split(engine) + ["--width", str(match["width"]), "--height", str(match["height"]),
+                                     "-s", str(match["seed"]), "--results-as-json"] + bot_commands
+    start = time.monotonic()
+    result = dict(match)
+    try:
+        completed = subprocess.run(command, cwd=workdir, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   timeout=timeout)
+        output = json.loads(completed.stdout.decode().strip().splitlines()[-1])
+        result["stats"] = output["stats"]
+        result["terminated"] = output.get("terminated", {})
+    except (subprocess.TimeoutExpired, ValueError, IndexError, KeyError) as error:
+        result["error"] = "{}: {}".format(type(error).__name__, error)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    result["elapsed"] = time.monotonic() - start
+    return result
+
+
+def run(matches, engine, workers, results_path=None, timeout=None):
+    """
+    Play matches over a process pool, appending each result to results_path as it finishes.
+    :return: The list of results (in completion order) and the wall-clock time taken
+    """
+    results = []
+    start = time.monotonic()
+    results_file = open(results_path, "a") if results_path else None
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(play, match, engine, timeout) for match in matches]
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if results_file:
+                    results_file.write(json.dumps(result) + "\n")
+                    results_file.flush()
+    finally:
+        if results_file:
+            results_file.close()
+    return results, time.monotonic() - start
+
+
+def summarize(results):
+    """
+    :return: {bot: {"games", "wins", "mean_rank", "mean_score"}} over the games that finished
+    """
+    totals = collections.defaultdict(lambda: {"games": 0, "wins": 0, "rank": 0, "score": 0})
+    for result in results:
+        if "stats" not in result:
+            continue
+        for seat, bot in enumerate(result["bots"]):
+            stats = result["stats"][str(seat)]
+            entry = totals[bot]
+            entry["games"] += 1
+            entry["wins"] += stats["rank"] == 1
+            entry["rank"] += stats["rank"]
+            entry["score"] += stats["score"]
+    return {bot: {"games": entry["games"], "wins": entry["wins"],
+                  "mean_rank": entry["rank"] / entry["games"], "mean_score": entry["score"] / entry["games"]}
+            for bot, entry in totals.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a parallel Halite III tournament between bot scripts.")
+    parser.add_argument("bots", nargs="+", help="bot scripts")
+    parser.add_argument("--engine", default=LOCAL_ENGINE,
+                        help="engine command, e.g. './halite --no-replay --no-logs' (default: the local engine)")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--players", type=int, default=2, choices=(2, 4))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[32, 40, 48, 56, 64])
+    parser.add_argument("--seed", type=int, default=0, help="base seed for map seeds and seatings")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--timeout", type=float, default=None, help="seconds allowed per game")
+    parser.add_argument("--results", default=None, help="JSON lines file to append results to")
+    parser.add_argument("--scaling", action="store_true",
+                        help="play the schedule once per worker count (1, 2, 4, ... --workers) and report speedup; "
+                             "results are not written, since every game is played several times")
+    args = parser.parse_args(argv)
+
+    matches = schedule(args.bots, args.games, args.players, args.sizes, args.seed)
+
+    if args.scaling:
+        if args.results:
+            print("--scaling replays the same games, so --results is ignored", file=sys.stderr)
+        worker_counts = sorted({min(2 ** power, args.workers) for power in range(args.workers.bit_length())} |
+                               {args.workers})
+        baseline = None
+        print("{:>8} {:>10} {:>9}".format("workers", "games/sec", "speedup"))
+        for workers in worker_counts:
+            results, elapsed = run(matches, args.engine, workers, None, args.timeout)
+            throughput = len(results) / elapsed
+            baseline = baseline or throughput
+            print("{:>8} {:>10.2f} {:>8.2f}x".format(workers, throughput, throughput / baseline))
+        return
+
+    results, elapsed = run(matches, args.engine, args.workers, args.results, args.timeout)
+    errors = sum("error" in result for result in results)
+    print("{} games in {:.1f}s ({:.2f} games/sec on {} workers), {} failed".format(
+        len(results), elapsed, len(results) / elapsed, args.workers, errors))
+    print("{:<30} {:>6} {:>6} {:>9} {:>11}".format("bot", "games", "wins", "mean rank", "mean score"))
+    for bot, entry in sorted(summarize(results).items(), key=lambda item: item[1]["mean_rank"]):
+        print("{:<30} {:>6} {:>6} {:>9.2f} {:>11.0f}".format(
+            bot, entry["games"], entry["wins"], entry["mean_rank"], entry["mean_score"]))
+
+
+if __name__ == "__main__":
+    main()